@@ -0,0 +1,68 @@
+"""
+Benchmark the execution of Lox programs.
+
+Usage:
+    python -m benchmark.interpreter [--rounds R] [--engine ENGINE] [FILE ...]
+
+Every program (by default the workloads in `benchmark/` and the scripts in `test/` the engine
+can run, see `is_runnable`) is compiled and run R times in-process with its output discarded,
+the best time is reported.
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import time
+from plox.engine.run import ENGINES, run
+from benchmark.scanner import TEST_DIR
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def time_program(path: str, rounds: int, **options) -> float:
+    with open(path, "r") as fb:
+        source = fb.read()
+
+    best = float("inf")
+    for _ in range(rounds):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            run(source, **options)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def is_runnable(path: str, engine: str) -> bool:
+    """
+    Whether the test script at `path` runs with `engine`. The sa_ scripts are rejected by the
+    static checks, and a script named after an engine, e.g. trampoline_tail_call.lox, needs it.
+    """
+    name = os.path.basename(path)
+    if name.startswith("sa_"):
+        return False
+    return all(not name.startswith(other + "_") for other in ENGINES if other != engine)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="*", help="Lox programs to run.")
+    parser.add_argument("--rounds", type=int, default=3, help="Number of timed runs per program, the best is kept.")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="tree", help="Execution engine.")
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob(os.path.join(BENCHMARK_DIR, "*.lox"))) + \
+        sorted(path for path in glob.glob(os.path.join(TEST_DIR, "*.lox"))
+               if is_runnable(path, args.engine))
+
+    total = 0.0
+    for path in files:
+        elapsed = time_program(path, args.rounds, engine=args.engine)
+        total += elapsed
+        print(f"{os.path.relpath(path):>30}: {elapsed * 1000:10.2f}ms")
+    print(f"{'total':>30}: {total * 1000:10.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
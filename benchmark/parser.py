@@ -0,0 +1,55 @@
+"""
+Benchmark the parsers against each other.
+
+Usage:
+    python -m benchmark.parser [--repeat N] [--rounds R]
+
+The benchmark scans every script under `test/` concatenated N times once, checks that
+all parsers build the same syntax tree from the tokens and reports tokens/sec.
+"""
+import argparse
+import time
+from plox.engine.run import PARSERS
+from plox.lexer import RegexScanner
+from plox.lexer.token import Token
+from benchmark.scanner import load_source
+
+
+def dump(node):
+    """
+    Structural representation of a syntax tree, tokens are compared by identity.
+    """
+    if isinstance(node, list):
+        return [dump(child) for child in node]
+    if isinstance(node, Token) or not hasattr(node, "__dict__"):
+        return node
+    return (node.__class__.__name__, {name: dump(value) for name, value in vars(node).items()})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200, help="Number of copies of the test scripts to parse.")
+    parser.add_argument("--rounds", type=int, default=5, help="Number of timed rounds per parser, the best is kept.")
+    args = parser.parse_args()
+
+    tokens = RegexScanner().scan_tokens(load_source(args.repeat))
+    print(f"tokens: {len(tokens)}")
+
+    reference = None
+    for name, parser_cls in PARSERS.items():
+        best = float("inf")
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            statements = parser_cls().parse(tokens)
+            best = min(best, time.perf_counter() - start)
+
+        if reference is None:
+            reference = dump(statements)
+        elif dump(statements) != reference:
+            raise AssertionError(f"parser '{name}' built a different syntax tree.")
+
+        print(f"{name:>10}: {best:8.3f}s  {len(tokens) / best:12.0f} tokens/sec")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark the scanner engines against each other.
+
+Usage:
+    python -m benchmark.scanner [--repeat N]
+
+The benchmark concatenates the scripts under `test/`, but the sa_ ones, N times into one
+big source, checks that all scanners produce the same token stream and reports tokens/sec
+together with the memory retained per token and the peak memory of lazily scanning the
+utf-8 encoded source with `iter_tokens`.
+"""
+import argparse
+import collections
+import glob
+import os
+import time
+import tracemalloc
+from plox.engine.run import SCANNERS
+
+
+TEST_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test")
+
+
+def load_source(repeat: int) -> str:
+    scripts = []
+    for path in sorted(glob.glob(os.path.join(TEST_DIR, "*.lox"))):
+        # the sa_ scripts are rejected by the static checks, some of them by the scanner.
+        if os.path.basename(path).startswith("sa_"):
+            continue
+        with open(path, "r") as fb:
+            scripts.append(fb.read())
+    return "\n".join(scripts * repeat)
+
+
+def signature(tokens):
+    return [(token.type, token.lexeme, token.literal, token.line) for token in tokens]
+
+
+def bytes_per_token(scanner_cls, source: str) -> float:
+    tracemalloc.start()
+    tokens = scanner_cls().scan_tokens(source)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / len(tokens)
+
+
+def streaming_peak(scanner_cls, source: bytes) -> int:
+    tracemalloc.start()
+    collections.deque(scanner_cls().iter_tokens(source), maxlen=0)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200, help="Number of copies of the test scripts to scan.")
+    args = parser.parse_args()
+
+    source = load_source(args.repeat)
+    encoded = source.encode("utf-8")
+    print(f"source: {len(source)} chars, {source.count(chr(10)) + 1} lines")
+
+    reference = None
+    for name, scanner_cls in SCANNERS.items():
+        start = time.perf_counter()
+        tokens = scanner_cls().scan_tokens(source)
+        elapsed = time.perf_counter() - start
+
+        if reference is None:
+            reference = signature(tokens)
+        elif signature(tokens) != reference:
+            raise AssertionError(f"scanner '{name}' produced a different token stream.")
+
+        memory = bytes_per_token(scanner_cls, source)
+        peak = streaming_peak(scanner_cls, encoded)
+        print(f"{name:>10}: {elapsed:8.3f}s  {len(tokens) / elapsed:12.0f} tokens/sec  "
+              f"{memory:8.1f} bytes/token  {peak / 1024:10.1f} KiB streaming peak")
+
+
+if __name__ == '__main__':
+    main()
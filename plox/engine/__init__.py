@@ -1 +1,2 @@
-from .run import run_promt, run_script
+from .run import run_promt, run_script, disassemble_script, transpile_script
+from .check import check_scripts
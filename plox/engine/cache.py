@@ -0,0 +1,91 @@
+import hashlib
+import os
+import pickle
+import stat
+from typing import List, Optional, Tuple
+import plox
+from plox.syntax.stmt import Stmt
+
+
+"""
+Compiled programs are cached next to the script, e.g. `test/fib.lox` is cached in
+`test/__loxcache__/fib.loxc`. A cache file starts with a header line holding the magic
+and the digest of the source it was compiled from, followed by the pickled program.
+
+Unpickling runs arbitrary code, so a cache file is only as trusted as the directory of the
+script: whoever can write the cache can run code in the next `--cache` run. A cache file
+that is not owned by the current user or that other users can write is ignored, see
+`is_trusted`, and the script is compiled again.
+"""
+CACHE_DIR = "__loxcache__"
+CACHE_SUFFIX = ".loxc"
+MAGIC = b"LOXC"
+# bumped whenever the layout of the cached program changes.
+FORMAT_VERSION = 10
+
+
+def source_digest(source) -> bytes:
+    """
+    Hash of the source together with the plox version, so that a cache file is invalidated
+    both when the script and when the interpreter changes.
+    """
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    digest = hashlib.sha256(f"{plox.__version__}:{FORMAT_VERSION}".encode("utf-8"))
+    digest.update(source)
+    return digest.hexdigest().encode("ascii")
+
+
+def cache_path(path: str) -> str:
+    directory, filename = os.path.split(os.path.abspath(path))
+    name, _ = os.path.splitext(filename)
+    return os.path.join(directory, CACHE_DIR, name + CACHE_SUFFIX)
+
+
+def load_program(path: str, digest: bytes) -> Optional[Tuple[List[Stmt], List[str]]]:
+    """
+    Load the compiled program of the script at `path`, i.e. its statements annotated with the
+    depths and slots computed by the Resolver, and the global names in the order of their index.
+    Return None if there is no valid cache for `digest`.
+    """
+    try:
+        with open(cache_path(path), "rb") as fb:
+            if not is_trusted(os.fstat(fb.fileno())):
+                return None
+            if fb.readline() != MAGIC + b" " + digest + b"\n":
+                return None
+            return pickle.load(fb)
+    except Exception:
+        # a missing, stale or corrupted cache is simply a cache miss.
+        return None
+
+
+def is_trusted(status: os.stat_result) -> bool:
+    """
+    Whether the cache file of `status` may be unpickled: it is owned by the current user and
+    neither its group nor the other users can write it. Ownership is not checked on platforms
+    without user ids.
+    """
+    if hasattr(os, "getuid") and status.st_uid != os.getuid():
+        return False
+    return not status.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def save_program(path: str, digest: bytes, statements: List[Stmt], global_names: List[str]) -> None:
+    """
+    Store the compiled program of the script at `path`. The resolved depths and slots are
+    attributes of the nodes, so they are pickled together with the statements. The indices of
+    the globals refer to the global table, so its names are stored as well.
+    """
+    target = cache_path(path)
+    temporary = f"{target}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(temporary, "wb") as fb:
+            fb.write(MAGIC + b" " + digest + b"\n")
+            pickle.dump((statements, global_names), fb, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, target)
+    except (OSError, RecursionError, pickle.PicklingError):
+        # caching is best effort, e.g. the directory may be read-only or the tree too deep.
+        if os.path.exists(temporary):
+            os.remove(temporary)
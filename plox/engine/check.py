@@ -0,0 +1,77 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, NamedTuple
+from plox.error import collect_errors
+from plox.syntax import Interpreter
+from plox.syntax.resolver import Resolver
+
+
+class CheckResult(NamedTuple):
+    path: str
+    errors: List[str]
+    seconds: float
+
+
+def find_scripts(paths: List[str]) -> Iterator[str]:
+    """
+    Yield the given script files and every `.lox` file found under the given directories.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for filename in sorted(files):
+                if filename.endswith(".lox"):
+                    yield os.path.join(root, filename)
+
+
+def check_file(path: str, scanner: str = "default", parser: str = "default") -> CheckResult:
+    """
+    Scan, parse and resolve the script at `path` and collect all of its errors. The program
+    is resolved only when it has no syntax errors, since a partially parsed tree can't be.
+    """
+    from plox.engine.run import SCANNERS, PARSERS
+
+    start = time.perf_counter()
+    with collect_errors() as errors:
+        try:
+            with open(path, "r") as fb:
+                source = fb.read()
+            statements = PARSERS[parser]().parse(SCANNERS[scanner]().iter_tokens(source))
+            if not errors:
+                Resolver(Interpreter()).resolve(statements)
+        except Exception as e:
+            errors.append(f"Internal error: {type(e).__name__}: {e}")
+    return CheckResult(path, list(errors), time.perf_counter() - start)
+
+
+def check_scripts(paths: List[str], scanner: str = "default", parser: str = "default", jobs: int = None) -> int:
+    """
+    Check every script under `paths` on a pool of `jobs` processes (all cores by default), print
+    the errors of every file with its check time followed by a summary.
+    Return the number of files with errors.
+    """
+    scripts = list(find_scripts(paths))
+    jobs = jobs or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(check_file, scripts, [scanner] * len(scripts), [parser] * len(scripts),
+                                    chunksize=max(1, len(scripts) // (jobs * 4))))
+    elapsed = time.perf_counter() - start
+
+    failed = 0
+    for result in results:
+        status = f"{len(result.errors)} error(s)" if result.errors else "ok"
+        print(f"{result.path}: {status} ({result.seconds * 1000:.1f}ms)")
+        for message in result.errors:
+            print(f"    {message}")
+        failed += bool(result.errors)
+
+    errors = sum(len(result.errors) for result in results)
+    print(f"Checked {len(results)} files in {elapsed:.2f}s with {jobs} processes: "
+          f"{errors} error(s) in {failed} file(s).")
+    return failed
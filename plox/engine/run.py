@@ -1,10 +1,39 @@
 import cmd
-from plox.lexer import Scanner
-from plox.syntax import Parser
-from plox.syntax import Interpreter
+import functools
+import mmap
+import sys
+from typing import List
+from plox.lexer import Scanner, RegexScanner
+from plox.syntax import Parser, PrattParser
+from plox.syntax import Interpreter, ClosureInterpreter, TrampolineInterpreter
 from plox.utils import check_path_exists, print_syntax_tree
-from plox.error import HAD_ERROR, HAD_RUNTIME_ERROR
+from plox.error import PLoxRuntimeError
+from plox import error as ERROR
 from plox.syntax.resolver import *
+from plox.syntax.optimizer import Optimizer
+from plox.syntax.output import Output, OUTPUT_SIZE
+from plox.vm import VM, disassemble
+from plox.transpiler import TranspilingInterpreter
+from plox.engine import cache as CACHE
+
+
+SCANNERS = {
+    "default": Scanner,
+    "regex": RegexScanner,
+}
+
+PARSERS = {
+    "default": Parser,
+    "pratt": PrattParser,
+}
+
+ENGINES = {
+    "tree": Interpreter,
+    "trampoline": TrampolineInterpreter,
+    "closure": ClosureInterpreter,
+    "vm": VM,
+    "python": TranspilingInterpreter,
+}
 
 
 class PLoxPromt(cmd.Cmd):
@@ -14,6 +43,10 @@ class PLoxPromt(cmd.Cmd):
     prompt = 'plox> '
     intro = ">>>>> PLox Interactive Shell <<<<<"
 
+    def __init__(self):
+        super().__init__()
+        self.interpreter = Interpreter()
+
     def do_exit(self, inp):
         print("Bye")
         return True
@@ -22,45 +55,246 @@ class PLoxPromt(cmd.Cmd):
         if "exit()" in line:
             return self.do_exit(line)
         
-        run(line)
-        HAD_ERROR = False
+        # the interpreter is kept from one line to the next, so are the globals defined so far.
+        run(line, interpreter=self.interpreter)
+        ERROR.HAD_ERROR = False
+
+    def postcmd(self, stop: bool, line: str) -> bool:
+        # the output of the line is shown before the next prompt.
+        self.interpreter.output.flush()
+        return stop
         
     do_EOF = do_exit
 
 
-def run_script(path: str):
+def run_script(path: str, scanner: str = "default", parser: str = "default", pipeline: bool = False,
+               cache: bool = False, passes: List[str] = (), engine: str = "tree", frames_max: int = None,
+               memo_size: int = None, output_size: int = None, flush: str = None, stats: bool = False):
     assert check_path_exists(path), f"Script file: {path} was not found."
-    with open(path, "r") as fb:
-        script = "\n".join(fb.readlines())
-        run(script)
+    if cache:
+        execute = functools.partial(run_cached, path=path)
+    elif pipeline:
+        execute = run_pipelined
+    else:
+        execute = run
+    options = dict(scanner=scanner, parser=parser, passes=passes, engine=engine, frames_max=frames_max,
+                   memo_size=memo_size, output_size=output_size, flush=flush)
+    with open(path, "rb") as fb:
+        # map the script file into memory instead of reading it, the scanners consume the
+        # mapped buffer directly. An empty file cannot be mapped.
+        if fb.seek(0, 2) == 0:
+            interpreter = execute("", **options)
+        else:
+            with mmap.mmap(fb.fileno(), 0, access=mmap.ACCESS_READ) as script:
+                interpreter = execute(script, **options)
+
+    if stats and interpreter is not None:
+        for name, count in sorted(interpreter.stats.items()):
+            print(f"{name}: {count}", file=sys.stderr)
     
-    if HAD_ERROR: exit(1)
-    if HAD_RUNTIME_ERROR: exit(2)
+    if ERROR.HAD_ERROR: exit(1)
+    if ERROR.HAD_RUNTIME_ERROR: exit(2)
     exit(0)
 
 
+def new_interpreter(engine: str = "tree", frames_max: int = None, memo_size: int = None,
+                    output_size: int = None, flush: str = None) -> Interpreter:
+    """
+    Create the execution engine named `engine` in `ENGINES`. `frames_max` bounds the depth of
+    the Lox call stack of the "vm", whose frames live on the heap. `memo_size` is the size of
+    the cache of the functions passed to the `memoize` native. `output_size` and `flush` are the
+    size in characters and the flush policy of the buffer of the printed lines, see `Output`.
+    None keeps the defaults.
+    """
+    if frames_max is None:
+        interpreter = ENGINES[engine]()
+    else:
+        interpreter = ENGINES[engine](frames_max=frames_max)
+    if memo_size is not None:
+        interpreter.memo_size = memo_size
+    if output_size is not None or flush is not None:
+        interpreter.output = Output(OUTPUT_SIZE if output_size is None else output_size, flush or "auto")
+    return interpreter
+
+
 def run_promt():
     promt = PLoxPromt()
     promt.cmdloop()
 
 # TODO: promt mode has bugs! previous state cannot be restored correctly!
-def run(source: str):
-    scanner = Scanner()
-    parser = Parser()
-    interpreter = Interpreter()
+def run(source: str, scanner: str = "default", parser: str = "default", passes: List[str] = (),
+        interpreter: Interpreter = None, engine: str = "tree", frames_max: int = None, memo_size: int = None,
+        output_size: int = None, flush: str = None):
+    """
+    Scan, parse, resolve and interpret the given source. Return the interpreter, or None if the
+    program did not compile.
 
-    tokens = scanner.scan_tokens(source)
-    # print(tokens)
-    statements = parser.parse(tokens)
-    if HAD_ERROR:
+    Args:
+        source (str): the plox source code, either a str or a bytes-like object such as a mmap
+            of the script file. Tokens are scanned lazily while the parser consumes them.
+        scanner (str): name of the scanner engine in `SCANNERS`, "default" for the
+            character-by-character `Scanner`, "regex" for the master pattern driven `RegexScanner`.
+        parser (str): name of the parser in `PARSERS`, "default" for the recursive-descent `Parser`,
+            "pratt" for the table-driven `PrattParser`.
+        passes (List[str]): names of the optimization passes run on the resolved program, see
+            `plox.syntax.optimizer.PASSES`.
+        interpreter (Interpreter): interpreter running the program, a new one by default. The REPL
+            passes the same interpreter for every line.
+        engine (str): name of the execution engine in `ENGINES` used when no interpreter is given,
+            "tree" for the tree-walking `Interpreter`, "trampoline" for the `TrampolineInterpreter`
+            which also makes proper tail calls, "closure" for the `ClosureInterpreter` which
+            compiles the program to Python closures before running it, "vm" for the `VM` which
+            compiles it to bytecode, "python" for the `TranspilingInterpreter` which translates it to
+            Python source compiled by CPython.
+        frames_max (int): maximum depth of the Lox call stack of the "vm" engine, see `new_interpreter`.
+        memo_size (int): size of the cache of memoized functions, see `new_interpreter`.
+        output_size (int): size of the buffer of the printed lines, see `new_interpreter`.
+        flush (str): flush policy of the buffer of the printed lines, see `new_interpreter`.
+    """
+    interpreter = interpreter or new_interpreter(engine, frames_max, memo_size, output_size, flush)
+    statements = compile_program(source, interpreter, scanner, parser)
+    if statements is None:
         return
+    statements = Optimizer(passes).optimize(statements)
+    interpreter.interpret(statements)
+    return interpreter
+
+
+def compile_program(source: str, interpreter: Interpreter, scanner: str = "default", parser: str = "default"):
+    """
+    Scan, parse and resolve the given source, the resolved depths and slots are recorded on the nodes.
+    Return the statements of the program, or None if any error was reported.
+    """
+    scanner = SCANNERS[scanner]()
+    parser = PARSERS[parser]()
+
+    tokens = scanner.iter_tokens(source)
+    # print(tokens)
+    try:
+        statements = parser.parse(tokens)
+    finally:
+        # the scanner may still hold a view of a mapped script, e.g. after a syntax error exits.
+        tokens.close()
+    if ERROR.HAD_ERROR:
+        return None
     # print(statements)
     # print_syntax_tree("program", statements, [])
 
-    # print("\n>>>>> PLox Results <<<<<\n")
-    interpreter = Interpreter()
     resolver = Resolver(interpreter)
     resolver.resolve(statements)
-    if HAD_ERROR:
-        return
+    if ERROR.HAD_ERROR:
+        return None
+    return statements
+
+
+def disassemble_script(path: str, scanner: str = "default", parser: str = "default", passes: List[str] = ()):
+    """
+    Print the bytecode the VM would run for the script at `path`, without running it.
+    """
+    assert check_path_exists(path), f"Script file: {path} was not found."
+    with open(path, "r") as fb:
+        source = fb.read()
+
+    vm = VM()
+    statements = compile_program(source, vm, scanner, parser)
+    if statements is None:
+        exit(1)
+    statements = Optimizer(passes).optimize(statements)
+    print(disassemble(vm.compiler.compile(statements)))
+
+
+def transpile_script(path: str, scanner: str = "default", parser: str = "default", passes: List[str] = ()):
+    """
+    Print the Python source the python engine would run for the script at `path`, without running it.
+    """
+    assert check_path_exists(path), f"Script file: {path} was not found."
+    with open(path, "r") as fb:
+        source = fb.read()
+
+    interpreter = TranspilingInterpreter()
+    statements = compile_program(source, interpreter, scanner, parser)
+    if statements is None:
+        exit(1)
+    statements = Optimizer(passes).optimize(statements)
+    print(interpreter.transpile(statements), end="")
+
+
+def run_cached(source: str, scanner: str = "default", parser: str = "default", passes: List[str] = (),
+               engine: str = "tree", frames_max: int = None, memo_size: int = None, output_size: int = None,
+               flush: str = None, path: str = None):
+    """
+    Interpret the script at `path` whose content is `source`, reusing the compiled program
+    cached by a previous run when the source has not changed. On a warm run the scanner,
+    the parser and the resolver are skipped entirely. The cached program is not optimized yet,
+    the optimization passes are run on every run.
+    """
+    digest = CACHE.source_digest(source)
+    interpreter = new_interpreter(engine, frames_max, memo_size, output_size, flush)
+
+    program = CACHE.load_program(path, digest)
+    if program is not None:
+        statements, global_names = program
+        # rebuild the global table so that the indices recorded on the cached nodes are valid.
+        for index, name in enumerate(global_names):
+            if interpreter.globals.index(name) != index:
+                interpreter = new_interpreter(engine, frames_max, memo_size, output_size, flush)
+                program = None
+                break
+
+    if program is None:
+        statements = compile_program(source, interpreter, scanner, parser)
+        if statements is None:
+            return
+        CACHE.save_program(path, digest, statements, list(interpreter.globals.names))
+
+    statements = Optimizer(passes).optimize(statements)
     interpreter.interpret(statements)
+    return interpreter
+
+
+def run_pipelined(source: str, scanner: str = "default", parser: str = "default", passes: List[str] = (),
+                  engine: str = "tree", frames_max: int = None, memo_size: int = None,
+                  output_size: int = None, flush: str = None):
+    """
+    Scan, parse, resolve and interpret the given source one top-level declaration at a time.
+
+    Each declaration is executed as soon as it has been parsed and resolved, so the output
+    starts after the first statement and a statement is released once it has been executed.
+    Unlike `run`, errors in later declarations are only reported after the preceding
+    declarations have been executed.
+
+    Args:
+        source (str): the plox source code, see `run`.
+        scanner (str): name of the scanner engine in `SCANNERS`, see `run`.
+        parser (str): name of the parser in `PARSERS`, see `run`.
+        passes (List[str]): names of the optimization passes, see `run`.
+        engine (str): name of the execution engine in `ENGINES`, see `run`.
+        frames_max (int): maximum depth of the Lox call stack, see `run`.
+        memo_size (int): size of the cache of memoized functions, see `run`.
+        output_size (int): size of the buffer of the printed lines, see `run`.
+        flush (str): flush policy of the buffer of the printed lines, see `run`.
+    """
+    scanner = SCANNERS[scanner]()
+    parser = PARSERS[parser]()
+    interpreter = new_interpreter(engine, frames_max, memo_size, output_size, flush)
+    resolver = Resolver(interpreter)
+    optimizer = Optimizer(passes)
+
+    tokens = scanner.iter_tokens(source)
+    try:
+        for statement in parser.parse_iter(tokens):
+            if ERROR.HAD_ERROR:
+                return
+            resolver.resolve(statement)
+            if ERROR.HAD_ERROR:
+                return
+            for statement in optimizer.optimize([statement]):
+                interpreter.execute(statement)
+            # the errors of the next declarations are reported after the output of this one.
+            interpreter.output.flush()
+    except PLoxRuntimeError as e:
+        interpreter.runtime_error(e)
+    finally:
+        interpreter.output.flush()
+        tokens.close()
+    return interpreter
@@ -1,7 +1,28 @@
+import contextlib
+from typing import Iterator, List
 from plox.lexer.token import Token
 HAD_ERROR = False
 HAD_RUNTIME_ERROR = False
 
+# when not None, reported errors are appended to this list instead of terminating the process.
+COLLECTED_ERRORS = None
+
+
+@contextlib.contextmanager
+def collect_errors() -> Iterator[List[str]]:
+    """
+    Collect the messages of all errors reported inside the `with` block instead of printing
+    the first one and exiting. The scanner and the resolver keep going after an error and the
+    parser resumes at the next statement, so every error of a script is collected.
+    """
+    global COLLECTED_ERRORS
+    previous = COLLECTED_ERRORS
+    COLLECTED_ERRORS = []
+    try:
+        yield COLLECTED_ERRORS
+    finally:
+        COLLECTED_ERRORS = previous
+
 
 def error(line: int, message: str):
     if isinstance(line, Token):
@@ -10,7 +31,12 @@ def error(line: int, message: str):
 
 
 def report(line: int, where: str, message: str):
-    print(f"[line {line}] Error {where}: {message}")
+    text = f"[line {line}] Error {where}: {message}"
+    if COLLECTED_ERRORS is not None:
+        COLLECTED_ERRORS.append(text)
+        return
+    global HAD_ERROR
+    print(text)
     HAD_ERROR = True
     exit(1)
 
@@ -22,6 +48,6 @@ class PLoxRuntimeError(RuntimeError):
 
 
 def runtime_error(error: PLoxRuntimeError):
+    global HAD_RUNTIME_ERROR
     print(error)
-    HAD_ERROR = True
     HAD_RUNTIME_ERROR = True
@@ -1 +1,2 @@
-from .scanner import Scanner
\ No newline at end of file
+from .scanner import Scanner
+from .regex_scanner import RegexScanner
@@ -0,0 +1,141 @@
+import re
+import sys
+from typing import Iterator, List
+from plox.lexer.token import *
+from plox.lexer.scanner import Scanner
+from plox.error import error
+
+
+"""
+Master pattern used by the RegexScanner. Every alternative is a named group, the name
+of the matched group tells the scanner how to handle the lexeme. The order matters:
+comments must be tried before the single-character SLASH and two-characters operators
+before their one-character prefixes.
+"""
+MASTER_PATTERN = re.compile(r"""
+    (?P<SPACE>[ \t\r]+)
+  | (?P<NEWLINE>\n+)
+  | (?P<COMMENT>//[^\n]*)
+  | (?P<STRING>"[^"]*")
+  | (?P<UNTERMINATED>")
+  | (?P<NUMBER>[0-9]+(?:\.[0-9]+)?)
+  | (?P<IDENTIFIER>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<OPERATOR>[!=<>]=?|[(){},.\-+;*:/])
+  | (?P<UNEXPECTED>.)
+""", re.VERBOSE | re.DOTALL)
+
+"""
+The same pattern compiled for bytes-like sources, so that a mmap of the script file can
+be scanned in place without reading it into a str first. An unexpected character is a
+whole utf-8 sequence there, not its first byte.
+"""
+MASTER_PATTERN_BYTES = re.compile(
+    MASTER_PATTERN.pattern.replace("(?P<UNEXPECTED>.)", r"(?P<UNEXPECTED>[\xc0-\xf7][\x80-\xbf]*|.)").encode(),
+    re.VERBOSE | re.DOTALL)
+
+
+OPERATORS = {
+    "(": LEFT_PAREN,
+    ")": RIGHT_PAREN,
+    "{": LEFT_BRACE,
+    "}": RIGHT_BRACE,
+    ",": COMMA,
+    ".": DOT,
+    "-": MINUS,
+    "+": PLUS,
+    ";": SEMICOLON,
+    "*": STAR,
+    ":": COLON,
+    "/": SLASH,
+    "!": BANG,
+    "!=": BANG_EQUAL,
+    "=": EQUAL,
+    "==": EQUAL_EQUAL,
+    "<": LESS,
+    "<=": LESS_EQUAL,
+    ">": GREATER,
+    ">=": GREATER_EQUAL,
+}
+
+
+class RegexScanner(Scanner):
+    """
+    Scanner engine driven by a single compiled master pattern.
+
+    Instead of walking the source one character at a time, each iteration of the
+    scanning loop consumes a whole lexeme (or a whole run of white spaces) with one
+    call into the regex engine, then dispatches on the name of the matched group.
+    It produces exactly the same tokens, line numbers and error reports as `Scanner`.
+    """
+    def iter_tokens(self, source) -> Iterator[Token]:
+        """
+        Lazily scan the source, yielding the tokens one by one. The source can be a str or
+        a bytes-like object such as a mmap, which is scanned in place: only the lexemes of
+        the tokens are decoded, so memory is bounded by the tokens not yet consumed.
+        """
+        self.source = source
+        keywords = self.keywords
+        line = self.line
+
+        if isinstance(source, str):
+            pattern = MASTER_PATTERN
+            decode = None
+        else:
+            pattern = MASTER_PATTERN_BYTES
+            decode = bytes.decode
+
+        # where the scanning resumes after an unexpected character, None once it is done.
+        position = 0
+        while position is not None:
+            # the matches hold a view of a mmap source: the loop is left and the match released
+            # before an error is reported, since reporting exits and the mmap is then closed.
+            failure = None
+            for match in pattern.finditer(source, position):
+                kind = match.lastgroup
+
+                if kind == "SPACE" or kind == "COMMENT":
+                    continue
+
+                if kind == "UNEXPECTED":
+                    failure = "Unexpected character."
+                    position = match.end()
+                    break
+
+                lexeme = match.group()
+                if decode is not None:
+                    lexeme = decode(lexeme, "utf-8")
+
+                if kind == "NEWLINE":
+                    line += len(lexeme)
+                elif kind == "IDENTIFIER":
+                    lexeme = sys.intern(lexeme)
+                    token_type = keywords.get(lexeme, IDENTIFIER)
+                    yield token_type(lexeme, None, line)
+                elif kind == "OPERATOR":
+                    yield OPERATORS[lexeme](lexeme, None, line)
+                elif kind == "NUMBER":
+                    yield NUMBER(lexeme, float(lexeme), line)
+                elif kind == "STRING":
+                    # strings may span multiple lines, the token is reported at the line where it ends.
+                    line += lexeme.count("\n")
+                    yield STRING(lexeme, lexeme[1:-1], line)
+                elif kind == "UNTERMINATED":
+                    line += source[match.end():].count(b"\n" if decode else "\n")
+                    failure = "Unterminated string."
+                    position = None
+                    break
+            else:
+                position = None
+            match = None
+
+            if failure is not None:
+                self.line = line
+                error(line, failure)
+
+        self.line = line
+        self.current = len(source)
+        yield EOF("", None, line)
+
+    def scan_tokens(self, source: str) -> List[Token]:
+        self.tokens.extend(self.iter_tokens(source))
+        return self.tokens
@@ -1,11 +1,19 @@
-from typing import List
+import codecs
+import sys
+from typing import Iterator, List
 from plox.lexer.token import *
 from plox.error import error
 
 
+# number of bytes of a bytes-like source decoded at a time by `Scanner.iter_tokens`.
+CHUNK_SIZE = 4096
+
+
 class Scanner:
     def __init__(self):
         self.source = None
+        # the decoded chunks of a bytes-like source not read yet, see `_fill`.
+        self.chunks = None
         self.tokens = []
         self.start = 0
         self.current = 0
@@ -32,7 +40,36 @@ class Scanner:
         }
     
     def _is_end(self) -> bool:
-        return self.current >= len(self.source)
+        return self.current >= len(self.source) and not self._fill()
+
+    def _fill(self) -> bool:
+        """
+        Append the next decoded chunk of a bytes-like source to `source`, dropping the text
+        before the lexeme being scanned. Return False when the whole source was read.
+        """
+        if self.chunks is None:
+            return False
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.chunks = None
+            return False
+        self.source = self.source[self.start:] + chunk
+        self.current -= self.start
+        self.start = 0
+        return True
+
+    def _decode(self, source) -> Iterator[str]:
+        """
+        Decode the bytes-like `source` as utf-8, CHUNK_SIZE bytes at a time.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        for offset in range(0, len(source), CHUNK_SIZE):
+            text = decoder.decode(source[offset:offset + CHUNK_SIZE])
+            if text:
+                yield text
+        text = decoder.decode(b"", final=True)
+        if text:
+            yield text
     
     def _advance(self) -> str:
         char = self.source[self.current]
@@ -57,14 +94,15 @@ class Scanner:
         Args:
             n (int): peek the n-th next character. By default peek the next character.
         """
-        if self.current + n - 1 >= len(self.source): return None
+        while self.current + n - 1 >= len(self.source):
+            if not self._fill(): return None
         return self.source[self.current + n - 1]
 
     def _is_digit(self, c) -> bool:
         """
-        Check whether the input character c is a digit number.
+        Check whether the input character c is a digit number. c is None past the end of the source.
         """
-        return ord(c) >= ord('0') and ord(c) <= ord('9')
+        return c is not None and ord(c) >= ord('0') and ord(c) <= ord('9')
 
     def _number(self) -> None:
         """
@@ -125,11 +163,12 @@ class Scanner:
         while not self._is_end() and self._is_alpha_numeric(self._peek()):
             self._advance()
         
-        text = self.source[self.start:self.current]
+        # identifiers are interned so that repeated names share a single string object.
+        text = sys.intern(self.source[self.start:self.current])
         if text in self.keywords:
-            self._add_token(self.keywords[text](self.source[self.start:self.current], None, self.line))
+            self._add_token(self.keywords[text](text, None, self.line))
         else:
-            self._add_token(IDENTIFIER(self.source[self.start:self.current], None, self.line))
+            self._add_token(IDENTIFIER(text, None, self.line))
         
     def _scan_token(self) -> None:
         c = self._advance()
@@ -152,13 +191,13 @@ class Scanner:
         elif c == ':': self._add_token(COLON(lexeme, literal, line))
         # two-characters token
         elif c == '!':
-            self._add_token(BANG_EQUAL(lexeme, literal, line) if self._match("=") else BANG(lexeme, literal, line))
+            self._add_token(BANG_EQUAL("!=", literal, line) if self._match("=") else BANG(lexeme, literal, line))
         elif c == '=':
-            self._add_token(EQUAL_EQUAL(lexeme, literal, line) if self._match("=") else EQUAL(lexeme, literal, line))
+            self._add_token(EQUAL_EQUAL("==", literal, line) if self._match("=") else EQUAL(lexeme, literal, line))
         elif c == '<':
-            self._add_token(LESS_EQUAL(lexeme, literal, line) if self._match("=") else LESS(lexeme, literal, line))
+            self._add_token(LESS_EQUAL("<=", literal, line) if self._match("=") else LESS(lexeme, literal, line))
         elif c == '>':
-            self._add_token(GREATER_EQUAL(lexeme, literal, line) if self._match("=") else GREATER(lexeme, literal, line))
+            self._add_token(GREATER_EQUAL(">=", literal, line) if self._match("=") else GREATER(lexeme, literal, line))
         # process for '/' which can be either division operator or the start of the comment
         elif c == '/':
             if self._match('/'):
@@ -187,6 +226,29 @@ class Scanner:
     def _add_token(self, token: Token) -> None:
         self.tokens.append(token)
 
+    def iter_tokens(self, source) -> Iterator[Token]:
+        """
+        Lazily scan the source, yielding the tokens one by one instead of materialising the
+        whole token list. The source can be a str or a bytes-like object, e.g. a mmap of the
+        script file, which is decoded as utf-8 a chunk at a time while it is scanned: only the
+        lexeme being scanned and the rest of the current chunk are kept in `source`.
+        """
+        if isinstance(source, str):
+            self.source = source
+        else:
+            self.source = ""
+            self.chunks = self._decode(source)
+        tokens = self.tokens
+        while not self._is_end():
+            self.start = self.current
+            count = len(tokens)
+            self._scan_token()
+            # each call of `_scan_token` adds at most one token.
+            if len(tokens) > count:
+                yield tokens.pop()
+
+        yield EOF("", None, self.line)
+
     def scan_tokens(self, source: str) -> List[Token]:
         self.source = source
         while not self._is_end():
@@ -1,13 +1,74 @@
+class TokenType:
+    """
+    Small integer kind of every token. The parser and the interpreter switch on
+    `token.kind` instead of testing the token class with `isinstance`.
+
+    Kinds are plain ints rather than `enum.IntEnum` members so that comparing them
+    and using them as dict keys stays as cheap as for any int.
+    """
+    LEFT_PAREN = 0
+    RIGHT_PAREN = 1
+    LEFT_BRACE = 2
+    RIGHT_BRACE = 3
+    COMMA = 4
+    DOT = 5
+    MINUS = 6
+    PLUS = 7
+    SEMICOLON = 8
+    SLASH = 9
+    STAR = 10
+    BANG = 11
+    BANG_EQUAL = 12
+    EQUAL = 13
+    EQUAL_EQUAL = 14
+    GREATER = 15
+    GREATER_EQUAL = 16
+    LESS = 17
+    LESS_EQUAL = 18
+    IDENTIFIER = 19
+    STRING = 20
+    NUMBER = 21
+    AND = 22
+    CLASS = 23
+    ELSE = 24
+    FALSE = 25
+    FUN = 26
+    FOR = 27
+    IF = 28
+    NIL = 29
+    OR = 30
+    PRINT = 31
+    RETURN = 32
+    SUPER = 33
+    THIS = 34
+    TRUE = 35
+    VAR = 36
+    WHILE = 37
+    LAMBDA = 38
+    COLON = 39
+    EOF = 40
+
+
 class Token:
     """
-    Base class for all tokens
+    Base class for all tokens.
+
+    Tokens use `__slots__` and keep their kind on the class, so an instance only stores
+    the lexeme, the literal and the line. The concrete subclasses below (`PLUS`, `IDENTIFIER`...)
+    are kept so that `isinstance(token, PLUS)` and `PLUS(lexeme, literal, line)` still work.
     """
-    def __init__(self, type: str, lexeme: str, literal: object, line: int):
-        self.type = type
+    __slots__ = ("lexeme", "literal", "line")
+    kind = None
+
+    def __init__(self, lexeme: str, literal: object, line: int):
         self.lexeme = lexeme
         self.literal = literal
         self.line = line
 
+    @property
+    def type(self) -> str:
+        return self.__class__.__name__
+
     def __repr__(self):
         return f"{self.type} {self.lexeme} {self.literal}"
 
@@ -16,217 +77,223 @@ Single-character tokens
 """
 
 class LEFT_PAREN(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("LEFT_PAREN", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.LEFT_PAREN
 
 
 class RIGHT_PAREN(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("RIGHT_PAREN", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.RIGHT_PAREN
 
 
 class LEFT_BRACE(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("LEFT_BRACE", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.LEFT_BRACE
 
 
 class RIGHT_BRACE(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("RIGHT_BRACE", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.RIGHT_BRACE
 
 
 class COMMA(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("COMMA", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.COMMA
 
 
 class DOT(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("DOT", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.DOT
 
 
 class MINUS(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("MINUS", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.MINUS
 
 
 class PLUS(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("PLUS", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.PLUS
 
 
 class SEMICOLON(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("SEMICOLON", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.SEMICOLON
 
 
 class SLASH(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("SLASH", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.SLASH
 
 
 class STAR(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("STAR", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.STAR
 
 """
 One or two character tokens
 """
 
 class BANG(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("BANG", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.BANG
 
 
 class BANG_EQUAL(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("BANG_EQUAL", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.BANG_EQUAL
 
 
 class EQUAL(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("EQUAL", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.EQUAL
 
 
 class EQUAL_EQUAL(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("EQUAL_EQUAL", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.EQUAL_EQUAL
 
 
 class GREATER(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("GREATER", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.GREATER
 
 
 class GREATER_EQUAL(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("GREATER_EQUAL", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.GREATER_EQUAL
 
 
 class LESS(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("LESS", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.LESS
 
 
 class LESS_EQUAL(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("LESS_EQUAL", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.LESS_EQUAL
 
 """
 Literals
 """
 
 class IDENTIFIER(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("IDENTIFIER", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.IDENTIFIER
 
 
 class STRING(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("STRING", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.STRING
 
 
 class NUMBER(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("NUMBER", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.NUMBER
 
 """
 Keywords
 """
 
 class AND(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("AND", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.AND
 
 
 class CLASS(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("CLASS", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.CLASS
 
 
 class ELSE(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("ELSE", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.ELSE
 
 
 class FALSE(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("FALSE", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.FALSE
 
 
 class FUN(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("FUN", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.FUN
 
 
 class FOR(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("FOR", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.FOR
 
 
 class IF(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("IF", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.IF
 
 
 class NIL(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("NIL", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.NIL
 
 
 class OR(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("OR", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.OR
 
 
 class PRINT(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("PRINT", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.PRINT
 
 
 class RETURN(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("RETURN", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.RETURN
 
 
 class SUPER(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("SUPER", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.SUPER
 
 
 class THIS(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("THIS", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.THIS
 
 
 class TRUE(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("TRUE", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.TRUE
 
 
 class VAR(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("VAR", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.VAR
 
 
 class WHILE(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("WHILE", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.WHILE
 
 
 class LAMBDA(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("LAMBDA", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.LAMBDA
 
 
 class COLON(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("COLON", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.COLON
 
 """
 EOF
 """
 
 class EOF(Token):
-    def __init__(self, lexeme: str, literal: object, line: int):
-        super().__init__("EOF", lexeme, literal, line)
+    __slots__ = ()
+    kind = TokenType.EOF
+
+
+"""
+Map from token kind to token class.
+"""
+TOKEN_CLASSES = {cls.kind: cls for cls in Token.__subclasses__()}
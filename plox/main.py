@@ -1,12 +1,60 @@
 import argparse
-from plox.engine import run_script, run_promt
+from plox.engine import run_script, run_promt, check_scripts, disassemble_script, transpile_script
 from plox import utils
+from plox.syntax.optimizer import PASSES, OPTIMIZATION_LEVELS
+from plox.syntax.output import FLUSH_POLICIES
 
 
 def get_args():
     parser = argparse.ArgumentParser()
     parser.add_argument("-f", "--file", type=str, help="Specify the plox script file path.", default="")
-    return parser.parse_args()
+    parser.add_argument("--scanner", type=str, choices=["default", "regex"], default="default",
+                        help="Specify the scanner engine used to tokenize the script.")
+    parser.add_argument("--parser", type=str, choices=["default", "pratt"], default="default",
+                        help="Specify the parser used to build the syntax tree.")
+    parser.add_argument("--engine", type=str, choices=["tree", "trampoline", "closure", "vm", "python"], default="tree",
+                        help="Specify the execution engine: walk the syntax tree, walk it making proper tail "
+                             "calls, compile it to closures first, "
+                             "compile it to bytecode run by a stack-based virtual machine, "
+                             "or translate it to Python source compiled by CPython.")
+    parser.add_argument("--max-frames", dest="frames_max", type=int, default=None, metavar="N",
+                        help="Maximum depth of Lox calls for the vm engine, whose call stack is not bound by "
+                             "the Python stack. Deeper recursion is reported as a stack overflow.")
+    parser.add_argument("--memo-size", type=int, default=None, metavar="N",
+                        help="Number of results cached by each function passed to memoize().")
+    parser.add_argument("--output-buffer", dest="output_size", type=int, default=None, metavar="N",
+                        help="Number of characters printed by the script buffered before they are written out.")
+    parser.add_argument("--flush", type=str, choices=FLUSH_POLICIES, default=None,
+                        help="When the printed lines are written out: after every line, when the buffer is full, "
+                             "or after every line only when the output is a terminal (auto, the default).")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print the runtime counters, e.g. the hits and misses of memoized functions, "
+                             "to stderr after the script.")
+    parser.add_argument("--disassemble", action="store_true",
+                        help="Print the bytecode compiled for the vm engine instead of running the script.")
+    parser.add_argument("--dump-python", action="store_true",
+                        help="Print the Python source generated for the python engine instead of running the script.")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Execute each top-level declaration as soon as it is parsed.")
+    parser.add_argument("--cache", action="store_true",
+                        help="Cache the compiled script in __loxcache__ and reuse it while the script is unchanged.")
+    parser.add_argument("-O", dest="level", type=int, choices=sorted(OPTIMIZATION_LEVELS), default=0,
+                        help="Optimization level: 1 removes groupings and folds constants, "
+                             "2 also prunes constant branches and dead code after return.")
+    parser.add_argument("--passes", type=str, default=None,
+                        help=f"Comma separated optimization passes to run instead of those of the -O level, "
+                             f"among: {', '.join(PASSES)}.")
+    parser.add_argument("--check", type=str, nargs="+", metavar="PATH",
+                        help="Scan, parse and resolve the given scripts and directories without running them, "
+                             "reporting every error.")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of processes used by --check, all cores by default.")
+    args = parser.parse_args()
+    if args.frames_max is not None and args.engine != "vm":
+        parser.error("--max-frames requires --engine vm")
+    if args.cache and args.pipeline:
+        parser.error("--cache can't be combined with --pipeline, which compiles each declaration as it runs")
+    return args
 
 
 def main():
@@ -17,8 +65,21 @@ def main():
     """
     args = get_args()
 
-    if args.file:
-        run_script(args.file)
+    if args.check:
+        exit(1 if check_scripts(args.check, args.scanner, args.parser, args.jobs) else 0)
+    elif args.file:
+        if args.passes is not None:
+            passes = [name for name in args.passes.split(",") if name]
+        else:
+            passes = OPTIMIZATION_LEVELS[args.level]
+        if args.disassemble:
+            disassemble_script(args.file, args.scanner, args.parser, passes)
+            return
+        if args.dump_python:
+            transpile_script(args.file, args.scanner, args.parser, passes)
+            return
+        run_script(args.file, args.scanner, args.parser, args.pipeline, args.cache, passes, args.engine,
+                   args.frames_max, args.memo_size, args.output_size, args.flush, args.stats)
     else:
         run_promt()
 
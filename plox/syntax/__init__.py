@@ -1,3 +1,6 @@
 from .util import Visitor
 from .parser import Parser
+from .pratt_parser import PrattParser
 from .interpreter import Interpreter
+from .closure_interpreter import ClosureInterpreter
+from .trampoline_interpreter import TrampolineInterpreter
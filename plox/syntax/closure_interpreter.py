@@ -0,0 +1,465 @@
+from typing import Callable, List
+from plox.syntax import Visitor
+from plox.syntax import expr as EXPR
+from plox.syntax import stmt as STMT
+from plox.lexer.token import *
+from plox.error import PLoxRuntimeError
+from plox.syntax.environment import Environment, UNDEFINED
+from plox.syntax.interpreter import Interpreter
+from plox.syntax.loxcallable import LoxCallable
+from plox.syntax.loxfunction import LoxFunction
+from plox.syntax.loxclass import LoxClass
+from plox.syntax.loxinstance import LoxInstance
+from plox.syntax.ret import Return
+
+
+"""
+A compiled node is a Python closure taking the current Environment: expressions return their
+value, statements return nothing.
+"""
+Code = Callable[[Environment], object]
+
+
+class CompiledFunction(LoxFunction):
+    """
+    LoxFunction whose body has been compiled to a closure. Binding, arity, initializers and
+    returns behave exactly like the LoxFunction run by the tree-walking Interpreter.
+    """
+    def __init__(self, declaration: STMT.Function, closure: Environment, is_initializer: bool, body: Code,
+                 receiver: LoxInstance = None):
+        super().__init__(declaration, closure, is_initializer, receiver)
+        self.body = body
+
+    def bind(self, instance: LoxInstance) -> LoxFunction:
+        return CompiledFunction(self.declaration, self.closure, self.is_initializer, self.body, instance)
+
+    def call(self, interpreter, arguments: List[object]) -> object:
+        environment = Environment(self.closure)
+        # the receiver of a method then the parameters are the first variables of the frame, in order.
+        if self.receiver is None:
+            environment.values = arguments
+        else:
+            environment.values = [self.receiver, *arguments]
+        try:
+            self.body(environment)
+        except Return as return_value:
+            if self.is_initializer:
+                return self.receiver
+            return return_value.value
+
+        return None
+
+
+class ClosureCompiler(Visitor):
+    """
+    Compile a resolved syntax tree into a tree of specialised Python closures.
+
+    Every visitor method returns the closure of the visited node, in which the closures of its
+    children, the operator and the resolved depth and slot are already bound. Running the
+    program is then a matter of calling closures, without the `evaluate` / `accept` / `visitXxx`
+    dispatch and the `isinstance` tests of the tree-walking Interpreter.
+    """
+    def __init__(self, interpreter: Interpreter):
+        self.interpreter = interpreter
+        # number of local scopes around the node being compiled, 0 at the top level.
+        self.scope_depth = 0
+
+    def compile(self, node) -> Code:
+        return node.accept(self)
+
+    def compile_statements(self, statements: List[STMT.Stmt]) -> Code:
+        codes = tuple(self.compile(statement) for statement in statements if statement is not None)
+        if len(codes) == 1:
+            return codes[0]
+
+        def sequence(environment):
+            for code in codes:
+                code(environment)
+        return sequence
+
+    def compile_function(self, declaration) -> Code:
+        self.scope_depth += 1
+        body = self.compile_statements(declaration.body)
+        self.scope_depth -= 1
+        return body
+
+    def compile_define(self, name: str) -> Callable[[Environment, object], None]:
+        """
+        Return a function defining the variable `name` in the scope being compiled.
+        """
+        if self.scope_depth == 0:
+            values = self.interpreter.globals.values
+            index = self.interpreter.globals.index(name)
+
+            def define_global(environment, value):
+                values[index] = value
+            return define_global
+
+        def define_local(environment, value):
+            environment.values.append(value)
+        return define_local
+
+    """
+    Statements
+    """
+
+    def visitBlockStmt(self, stmt: STMT.Block) -> Code:
+        self.scope_depth += 1
+        body = self.compile_statements(stmt.statements)
+        self.scope_depth -= 1
+
+        def block(environment):
+            body(Environment(environment))
+        return block
+
+    def visitClassStmt(self, stmt: STMT.Class) -> Code:
+        name = stmt.name.lexeme
+        define = self.compile_define(name)
+        superclass_code = self.compile(stmt.superclass) if stmt.superclass is not None else None
+        superclass_name = stmt.superclass.name if stmt.superclass is not None else None
+
+        # the methods are closed over the scope holding "super" when there is a superclass.
+        if superclass_code is not None:
+            self.scope_depth += 1
+        methods = [(method, method.name.lexeme == "init", self.compile_function(method)) for method in stmt.methods]
+        if superclass_code is not None:
+            self.scope_depth -= 1
+
+        def class_declaration(environment):
+            superclass = None
+            closure = environment
+            if superclass_code is not None:
+                superclass = superclass_code(environment)
+                if not isinstance(superclass, LoxClass):
+                    raise PLoxRuntimeError(superclass_name, "Superclass must be a class.")
+                closure = Environment(environment)
+                closure.define("super", superclass)
+
+            functions = dict()
+            for method, is_initializer, body in methods:
+                functions[method.name.lexeme] = CompiledFunction(method, closure, is_initializer, body)
+
+            define(environment, LoxClass(name, superclass, functions))
+        return class_declaration
+
+    def visitExpressionStmt(self, stmt: STMT.Expression) -> Code:
+        return self.compile(stmt.expression)
+
+    def visitFunctionStmt(self, stmt: STMT.Function) -> Code:
+        define = self.compile_define(stmt.name.lexeme)
+        body = self.compile_function(stmt)
+
+        def function_declaration(environment):
+            define(environment, CompiledFunction(stmt, environment, False, body))
+        return function_declaration
+
+    def visitIfStmt(self, stmt: STMT.If) -> Code:
+        condition = self.compile(stmt.condition)
+        then_branch = self.compile(stmt.then_branch)
+        is_truthy = self.interpreter.is_truthy
+
+        if stmt.else_branch is None:
+            def if_then(environment):
+                if is_truthy(condition(environment)):
+                    then_branch(environment)
+            return if_then
+
+        else_branch = self.compile(stmt.else_branch)
+
+        def if_then_else(environment):
+            if is_truthy(condition(environment)):
+                then_branch(environment)
+            else:
+                else_branch(environment)
+        return if_then_else
+
+    def visitPrintStmt(self, stmt: STMT.Print) -> Code:
+        expression = self.compile(stmt.expression)
+        stringify = self.interpreter.stringify
+        write = self.interpreter.output.write
+
+        def print_statement(environment):
+            write(stringify(expression(environment)))
+        return print_statement
+
+    def visitReturnStmt(self, stmt: STMT.Return) -> Code:
+        if stmt.value is None:
+            def return_nil(environment):
+                raise Return(None)
+            return return_nil
+
+        value = self.compile(stmt.value)
+
+        def return_value(environment):
+            raise Return(value(environment))
+        return return_value
+
+    def visitVarStmt(self, stmt: STMT.Var) -> Code:
+        define = self.compile_define(stmt.name.lexeme)
+        if stmt.initializer is None:
+            def var_declaration(environment):
+                define(environment, None)
+            return var_declaration
+
+        initializer = self.compile(stmt.initializer)
+
+        def var_declaration_initialized(environment):
+            define(environment, initializer(environment))
+        return var_declaration_initialized
+
+    def visitWhileStmt(self, stmt: STMT.While) -> Code:
+        condition = self.compile(stmt.condition)
+        body = self.compile(stmt.body)
+        is_truthy = self.interpreter.is_truthy
+
+        def while_loop(environment):
+            while is_truthy(condition(environment)):
+                body(environment)
+        return while_loop
+
+    """
+    Expressions
+    """
+
+    def visitAssignExpr(self, expr: EXPR.Assign) -> Code:
+        value_code = self.compile(expr.value)
+        depth, slot = expr.depth, expr.slot
+
+        if depth is None:
+            values = self.interpreter.globals.values
+            name = expr.name
+
+            def assign_global(environment):
+                value = value_code(environment)
+                if values[slot] is UNDEFINED:
+                    raise PLoxRuntimeError(name, f"Undefined variable {name.lexeme}.")
+                values[slot] = value
+                return value
+            return assign_global
+
+        if depth == 0:
+            def assign_local(environment):
+                value = environment.values[slot] = value_code(environment)
+                return value
+            return assign_local
+
+        def assign(environment):
+            value = value_code(environment)
+            environment.assign_at(depth, slot, value)
+            return value
+        return assign
+
+    def visitBinaryExpr(self, expr: EXPR.Binary) -> Code:
+        left = self.compile(expr.left)
+        right = self.compile(expr.right)
+        operator = expr.operator
+        kind = operator.kind
+
+        if kind == TokenType.PLUS:
+            stringify = self.interpreter.stringify
+
+            def plus(environment):
+                a = left(environment)
+                b = right(environment)
+                if isinstance(a, float) and isinstance(b, float):
+                    return a + b
+                if isinstance(a, str) or isinstance(b, str):
+                    return stringify(a) + stringify(b)
+                return None
+            return plus
+
+        if kind == TokenType.EQUAL_EQUAL or kind == TokenType.BANG_EQUAL:
+            is_equal = self.interpreter.is_equal
+            negate = kind == TokenType.BANG_EQUAL
+
+            def equality(environment):
+                return is_equal(left(environment), right(environment)) is not negate
+            return equality
+
+        # the remaining operators only take numbers.
+        operation = NUMBER_OPERATIONS[kind]
+
+        def arithmetic(environment):
+            a = left(environment)
+            b = right(environment)
+            if isinstance(a, float) and isinstance(b, float):
+                return operation(a, b)
+            raise PLoxRuntimeError(operator, "operand must be a number")
+        return arithmetic
+
+    def visitCallExpr(self, expr: EXPR.Call) -> Code:
+        callee_code = self.compile(expr.callee)
+        argument_codes = tuple(self.compile(argument) for argument in expr.arguments)
+        paren = expr.paren
+        interpreter = self.interpreter
+
+        def call(environment):
+            callee = callee_code(environment)
+            arguments = [argument(environment) for argument in argument_codes]
+
+            if not isinstance(callee, LoxCallable):
+                raise PLoxRuntimeError(paren, "Can only call functions and classes.")
+
+            if len(arguments) != callee.arity():
+                raise PLoxRuntimeError(paren, f"Expected {callee.arity()} arguments but got {len(arguments)}.")
+
+            return callee.call(interpreter, arguments)
+        return call
+
+    def visitGetExpr(self, expr: EXPR.Get) -> Code:
+        object_code = self.compile(expr.object)
+        name = expr.name
+
+        def get(environment):
+            object = object_code(environment)
+            if isinstance(object, LoxInstance):
+                return object.get(name)
+            raise PLoxRuntimeError(name, "Only instances have properties.")
+        return get
+
+    def visitGroupingExpr(self, expr: EXPR.Grouping) -> Code:
+        return self.compile(expr.expression)
+
+    def visitLambdaExpr(self, expr: EXPR.Lambda) -> Code:
+        body = self.compile_function(expr)
+
+        def lambda_function(environment):
+            return CompiledFunction(expr, environment, False, body)
+        return lambda_function
+
+    def visitLiteralExpr(self, expr: EXPR.Literal) -> Code:
+        value = expr.value
+
+        def literal(environment):
+            return value
+        return literal
+
+    def visitLogicalExpr(self, expr: EXPR.Logical) -> Code:
+        left = self.compile(expr.left)
+        right = self.compile(expr.right)
+        is_truthy = self.interpreter.is_truthy
+
+        if expr.operator.kind == TokenType.OR:
+            def logical_or(environment):
+                value = left(environment)
+                return value if is_truthy(value) else right(environment)
+            return logical_or
+
+        def logical_and(environment):
+            value = left(environment)
+            return right(environment) if is_truthy(value) else value
+        return logical_and
+
+    def visitSetExpr(self, expr: EXPR.Set) -> Code:
+        object_code = self.compile(expr.object)
+        value_code = self.compile(expr.value)
+        name = expr.name
+
+        def set(environment):
+            object = object_code(environment)
+            if not isinstance(object, LoxInstance):
+                raise PLoxRuntimeError(name, "Only instances have fields.")
+            value = value_code(environment)
+            object.set(name, value)
+            return value
+        return set
+
+    def visitSuperExpr(self, expr: EXPR.Super) -> Code:
+        depth, slot = expr.depth, expr.slot
+        method_name = expr.method
+
+        def super_method(environment):
+            superclass = environment.get_at(depth, slot)
+            object = environment.get_at(depth - 1, 0)
+            method = superclass.find_function(method_name.lexeme)
+            if method is None:
+                raise PLoxRuntimeError(method_name, f"Undefined property '{method_name.lexeme}'.")
+            return method.bind(object)
+        return super_method
+
+    def visitThisExpr(self, expr: EXPR.This) -> Code:
+        return self.compile_variable(expr.keyword, expr)
+
+    def visitUnaryExpr(self, expr: EXPR.Unary) -> Code:
+        right = self.compile(expr.right)
+        operator = expr.operator
+
+        if operator.kind == TokenType.MINUS:
+            def negate(environment):
+                value = right(environment)
+                if isinstance(value, float):
+                    return -value
+                raise PLoxRuntimeError(operator, "operand must be a number")
+            return negate
+
+        is_truthy = self.interpreter.is_truthy
+
+        def bang(environment):
+            return not is_truthy(right(environment))
+        return bang
+
+    def visitVariableExpr(self, expr: EXPR.Variable) -> Code:
+        return self.compile_variable(expr.name, expr)
+
+    def compile_variable(self, name: Token, expr: EXPR.Expr) -> Code:
+        depth, slot = expr.depth, expr.slot
+
+        if depth is None:
+            values = self.interpreter.globals.values
+
+            def global_variable(environment):
+                value = values[slot]
+                if value is UNDEFINED:
+                    raise PLoxRuntimeError(name, f"Variable {name.lexeme} does not exist.")
+                return value
+            return global_variable
+
+        if depth == 0:
+            def local_variable(environment):
+                return environment.values[slot]
+            return local_variable
+
+        if depth == 1:
+            def enclosing_variable(environment):
+                return environment.enclosing.values[slot]
+            return enclosing_variable
+
+        def variable(environment):
+            return environment.get_at(depth, slot)
+        return variable
+
+
+"""
+Operators taking two numbers, keyed by the kind of the operator token.
+"""
+NUMBER_OPERATIONS = {
+    TokenType.GREATER: lambda a, b: a > b,
+    TokenType.GREATER_EQUAL: lambda a, b: a >= b,
+    TokenType.LESS: lambda a, b: a < b,
+    TokenType.LESS_EQUAL: lambda a, b: a <= b,
+    TokenType.MINUS: lambda a, b: a - b,
+    TokenType.SLASH: lambda a, b: a / b,
+    TokenType.STAR: lambda a, b: a * b,
+}
+
+
+class ClosureInterpreter(Interpreter):
+    """
+    Execution engine running the program compiled by the ClosureCompiler. It shares the
+    globals, LoxFunction, LoxClass and LoxInstance semantics with the tree-walking Interpreter.
+    """
+    def __init__(self):
+        super().__init__()
+        self.compiler = ClosureCompiler(self)
+
+    def interpret(self, statements) -> None:
+        try:
+            code = self.compiler.compile_statements(statements)
+            code(self.globals)
+        except PLoxRuntimeError as e:
+            self.runtime_error(e)
+        finally:
+            self.output.flush()
+
+    def execute(self, stmt: STMT.Stmt):
+        self.compiler.compile(stmt)(self.environment)
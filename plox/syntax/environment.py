@@ -3,25 +3,41 @@ from plox.lexer.token import Token
 
 
 class Environment:
+    """
+    Array-backed frame of the local variables of a block, a function call or a class body.
+
+    The Resolver gives every local variable a slot, its position among the declarations of
+    its scope, and since the declarations of a scope are executed in order, `define` simply
+    appends the value to the frame. A variable is then addressed by (depth, slot), the number
+    of frames to walk up and the index in that frame, without hashing its name.
+    """
+    __slots__ = ("enclosing", "values")
+
     def __init__(self, enclosing = None):
         """
         Args:
             enclosing (Enviroment): the immediately closing Enviroment outside of current Enviroment.
         """
         self.enclosing = enclosing
-        self.values = {}
-    
+        self.values = []
+
     def define(self, name: str, value: object) -> None:
         """
-        binds the value to a specified variable name.
+        binds the value to the next slot. The name is only used by the GlobalEnvironment.
         """
-        self.values[name] = value
-    
-    def get_at(self, distance: int, name: str) -> object:
-        return self.ancestor(distance).values.get(name)
-    
-    def assign_at(self, distance: int, name: Token, value: object):
-        self.ancestor(distance).values[name.lexeme] = value
+        self.values.append(value)
+
+    def get_at(self, distance: int, slot: int) -> object:
+        environment = self
+        for _ in range(distance):
+            environment = environment.enclosing
+        return environment.values[slot]
+
+    def assign_at(self, distance: int, slot: int, value: object):
+        environment = self
+        for _ in range(distance):
+            environment = environment.enclosing
+        environment.values[slot] = value
 
     def ancestor(self, distance: int):
         environment = self
@@ -29,22 +45,63 @@ class Environment:
             environment =  environment.enclosing
         return environment
 
+
+"""
+Value of a global whose name has an index but that has not been defined yet.
+"""
+UNDEFINED = object()
+
+
+class GlobalEnvironment:
+    """
+    Environment of the global variables.
+
+    Globals are not tracked in scopes by the Resolver, but each global name gets a fixed index
+    in this table the first time it is resolved, so that reading and writing a global is an
+    indexed load or store. The table grows as new globals appear, e.g. one REPL line after
+    another, and a name that has an index but no value yet is still an undefined variable.
+    """
+    def __init__(self):
+        self.enclosing = None
+        # the index of every global name, and the values of the globals by index.
+        self.names = {}
+        self.values = []
+
+    def index(self, name: str) -> int:
+        """
+        Return the index of the global `name`, allocating one if the name is new.
+        """
+        index = self.names.get(name)
+        if index is None:
+            index = self.names[name] = len(self.values)
+            self.values.append(UNDEFINED)
+        return index
+
+    def define(self, name: str, value: object) -> None:
+        """
+        binds the value to a specified variable name.
+        """
+        self.values[self.index(name)] = value
+
     def get(self, name: str) -> object:
-        if name in self.values:
-            return self.values[name]
-        
-        if self.enclosing:
-            return self.enclosing.get(name)
-        
-        raise PLoxRuntimeError(name, f"Variable {name} does not exist.")
+        index = self.names.get(name)
+        if index is None or self.values[index] is UNDEFINED:
+            raise PLoxRuntimeError(name, f"Variable {name} does not exist.")
+        return self.values[index]
+
+    def get_at(self, index: int, name: Token) -> object:
+        value = self.values[index]
+        if value is UNDEFINED:
+            raise PLoxRuntimeError(name, f"Variable {name.lexeme} does not exist.")
+        return value
 
     def assign(self, name: Token, value: object) -> None:
-        if name.lexeme in self.values:
-            self.values[name.lexeme] = value
-            return
-        
-        if self.enclosing:
-            self.enclosing.assign(name, value)
-            return
-        
-        raise PLoxRuntimeError(name, f"Undefined variable {name.lexeme}.")
+        index = self.names.get(name.lexeme)
+        if index is None:
+            raise PLoxRuntimeError(name, f"Undefined variable {name.lexeme}.")
+        self.assign_at(index, name, value)
+
+    def assign_at(self, index: int, name: Token, value: object) -> None:
+        if self.values[index] is UNDEFINED:
+            raise PLoxRuntimeError(name, f"Undefined variable {name.lexeme}.")
+        self.values[index] = value
@@ -17,6 +17,9 @@ class Assign(Expr):
     def __init__(self, name: Token, value: Expr):
         self.name = name
         self.value = value
+        # resolved by the Resolver, None for a global variable.
+        self.depth = None
+        self.slot = None
 
     def accept(self, visitor: Visitor) -> None:
         return visitor.visitAssignExpr(self)
@@ -27,16 +30,47 @@ class Binary(Expr):
         self.left = left
         self.operator = operator
         self.right = right
+        # set by the Interpreter when it rewrites the node into one of the variants below.
+        self.quickened = False
+        self.operation = None
 
     def accept(self, visitor: Visitor) -> None:
         return visitor.visitBinaryExpr(self)
 
 
+class NumberBinary(Binary):
+    """
+    `Binary` whose operands were numbers when the Interpreter first executed it. `operation`
+    is the Python operator, applied as long as both operands are still floats.
+    """
+    def accept(self, visitor: Visitor) -> None:
+        return visitor.visitNumberBinaryExpr(self)
+
+
+class StringBinary(Binary):
+    """
+    `+` whose operands were strings when the Interpreter first executed it.
+    """
+    def accept(self, visitor: Visitor) -> None:
+        return visitor.visitStringBinaryExpr(self)
+
+
+class EqualityBinary(Binary):
+    """
+    `==` or `!=` once executed by the Interpreter, `operation` is the Python operator.
+    """
+    def accept(self, visitor: Visitor) -> None:
+        return visitor.visitEqualityBinaryExpr(self)
+
+
 class Call(Expr):
     def __init__(self, callee: Expr, paren: Token, arguments: List[Expr]):
         self.callee = callee
         self.paren = paren
         self.arguments = arguments
+        # inline cache of the Interpreter: the callee of the last call and its arity.
+        self.cache_callee = None
+        self.cache_arity = None
 
     def accept(self, visitor: Visitor) -> None:
         return visitor.visitCallExpr(self)
@@ -46,6 +80,11 @@ class Get(Expr):
     def __init__(self, object: Expr, name: Token):
         self.object = object
         self.name = name
+        # inline cache of the Interpreter: the shape of the last instance and the index of the
+        # field `name` in its values, or its method `name` when the index is None.
+        self.cache_shape = None
+        self.cache_index = None
+        self.cache_method = None
     
     def accept(self, visitor: Visitor) -> None:
         return visitor.visitGetExpr(self)
@@ -82,6 +121,11 @@ class Set(Expr):
         self.object = object
         self.name = name
         self.value = value
+        # inline cache of the Interpreter: the shape of the last instance and the index of the
+        # field `name` in its values, or the shape the instance moves to when it adds the field.
+        self.cache_shape = None
+        self.cache_index = None
+        self.cache_transition = None
 
     def accept(self, visitor: Visitor) -> None:
         return visitor.visitSetExpr(self)
@@ -91,6 +135,11 @@ class Super(Expr):
     def __init__(self, keyword: Token, method: Token):
         self.keyword = keyword
         self.method = method
+        self.depth = None
+        self.slot = None
+        # inline cache of the Interpreter: the last superclass and its method `method`.
+        self.cache_class = None
+        self.cache_method = None
     
     def accept(self, visitor: Visitor) -> None:
         return visitor.visitSuperExpr(self)
@@ -98,6 +147,8 @@ class Super(Expr):
 class This(Expr):
     def __init__(self, keyword: Token):
         self.keyword = keyword
+        self.depth = None
+        self.slot = None
     
     def accept(self, visitor: Visitor) -> None:
         return visitor.visitThisExpr(self)
@@ -107,24 +158,35 @@ class Unary(Expr):
     def __init__(self, operator: Token, right: Expr):
         self.operator = operator
         self.right = right
+        # set by the Interpreter when it rewrites the node into one of the variants below.
+        self.quickened = False
     
     def accept(self, visitor: Visitor) -> None:
         return visitor.visitUnaryExpr(self)
 
 
-class Set(Expr):
-    def __init__(self, object: Expr, name: Token, value: Expr):
-        self.object = object
-        self.name = name
-        self.value = value
+class NumberUnary(Unary):
+    """
+    `-` whose operand was a number when the Interpreter first executed it.
+    """
+    def accept(self, visitor: Visitor) -> None:
+        return visitor.visitNumberUnaryExpr(self)
 
+
+class NotUnary(Unary):
+    """
+    `!` once executed by the Interpreter.
+    """
     def accept(self, visitor: Visitor) -> None:
-        return visitor.visitSetExpr(self)
+        return visitor.visitNotUnaryExpr(self)
 
 
 class Variable(Expr):
     def __init__(self, name: Token):
         self.name = name
+        # resolved by the Resolver, None for a global variable.
+        self.depth = None
+        self.slot = None
 
     def accept(self, visitor: Visitor) -> None:
         return visitor.visitVariableExpr(self)
@@ -1,38 +1,74 @@
+import collections
+import operator
+from typing import List
 from plox.syntax import Visitor
 from plox.syntax import expr as EXPR
 from plox.syntax import stmt as STMT
 from plox.lexer.token import *
 from plox.error import runtime_error, PLoxRuntimeError
-from plox.syntax.environment import Environment
-from plox.syntax.loxcallable import Clock, LoxCallable
+from plox.syntax.environment import Environment, GlobalEnvironment
+from plox.syntax.loxcallable import Clock, LoxCallable, Memoize, MEMO_SIZE
 from plox.syntax.loxfunction import LoxCallable, LoxFunction
-from plox.syntax.ret import Return
+from plox.syntax.ret import RETURN
 from plox.syntax.loxclass import LoxClass
 from plox.syntax.loxinstance import LoxInstance
+from plox.syntax.output import Output, format_number
+from plox.syntax.loxstring import STRING_TYPES, ROPE_THRESHOLD, concatenate
 
 
 class Interpreter(Visitor):
     def __init__(self):
-        self.globals = Environment()
+        self.globals = GlobalEnvironment()
         self.environment = self.globals
         self.globals.define("clock", Clock())
-        self.locals = {}
+        self.globals.define("memoize", Memoize(self))
+        # size of the cache of the functions memoized from now on.
+        self.memo_size = MEMO_SIZE
+        # counters of the runtime, e.g. the hits of memoized functions, by name.
+        self.stats = collections.Counter()
+        # value of the Lox `return` being executed, see `RETURN`.
+        self.return_value = None
+        # buffer of the lines printed by the program.
+        self.output = Output()
 
     def interpret(self, statements) -> None:
         try: 
             for statement in statements:
                 self.execute(statement)
         except PLoxRuntimeError as e:
-            runtime_error(e)
+            self.runtime_error(e)
+        finally:
+            self.output.flush()
+
+    def runtime_error(self, error: PLoxRuntimeError) -> None:
+        """
+        Report `error` after the output printed before it.
+        """
+        self.output.flush()
+        runtime_error(error)
 
     def execute(self, stmt: STMT.Stmt):
-        stmt.accept(self)
+        """
+        Execute `stmt`, return its completion: None, or `RETURN` when it ran a Lox `return`.
+        """
+        return stmt.accept(self)
     
-    def resolve(self, expr: EXPR.Expr, depth: int):
-        self.locals[expr] = depth
+    def resolve(self, expr: EXPR.Expr, depth: int, slot: int):
+        """
+        Record on the node where the variable it refers to lives: `depth` environments up, at `slot`.
+        """
+        expr.depth = depth
+        expr.slot = slot
+
+    def resolve_global(self, expr: EXPR.Expr, name: Token):
+        """
+        Record on the node the index of the global variable it refers to, its depth stays None.
+        """
+        expr.depth = None
+        expr.slot = self.globals.index(name.lexeme)
 
     def visitBlockStmt(self, stmt: STMT.Block):
-        self.execute_block(stmt.statements, Environment(self.environment))
+        return self.execute_block(stmt.statements, Environment(self.environment))
 
     def execute_block(self, statements, environment: Environment):
         # original enviroment outside the block
@@ -40,7 +76,8 @@ class Interpreter(Visitor):
         try:
             self.environment = environment
             for statement in statements:
-                self.execute(statement)
+                if statement.accept(self) is not None:
+                    return RETURN
         finally:
             # after leaving this block, delete related environment,
             # i.e. restore to the original environment
@@ -49,15 +86,10 @@ class Interpreter(Visitor):
     def stringify(self, object: object) -> str:
         if object is None: return "nil"
         if isinstance(object, float):
-            text = str(object)
-            if text.endswith(".0"):
-                text = text[:len(text)-2]
-            return text
+            return format_number(object)
         return str(object)
 
     def visitClassStmt(self, stmt: STMT.Class) -> None:
-        self.environment.define(stmt.name.lexeme, None)
-
         if stmt.superclass:
             superclass = self.evaluate(stmt.superclass)
             if not isinstance(superclass, LoxClass):
@@ -77,14 +109,15 @@ class Interpreter(Visitor):
         if superclass is not None:
             self.environment = self.environment.enclosing
 
-        self.environment.assign(stmt.name, klass)
+        # the class is defined once it is created, the methods only refer to it when called.
+        self.environment.define(stmt.name.lexeme, klass)
 
     def visitLiteralExpr(self, expr: EXPR.Literal) -> object:
         return expr.value
     
     def visitLogicalExpr(self, expr: EXPR.Logical):
         left = self.evaluate(expr.left)
-        if isinstance(expr.operator.type, OR):
+        if expr.operator.kind == TokenType.OR:
             if self.is_truthy(left):
                 return left
         else:
@@ -102,24 +135,42 @@ class Interpreter(Visitor):
     def visitUnaryExpr(self, expr: EXPR.Unary) -> object:
         right = self.evaluate(expr.right)
         
-        if isinstance(expr.operator.type, MINUS):
+        kind = expr.operator.kind
+        if kind == TokenType.MINUS:
             self.check_number_operand(expr.operator, right)
-            return -float(right)
-        elif isinstance(expr.operator.type, BANG):
-            return self.is_truthy(right)
+            if not expr.quickened:
+                expr.quickened = True
+                expr.__class__ = EXPR.NumberUnary
+            return -right
+        elif kind == TokenType.BANG:
+            if not expr.quickened:
+                expr.quickened = True
+                expr.__class__ = EXPR.NotUnary
+            return not self.is_truthy(right)
 
         return None
 
+    def visitNumberUnaryExpr(self, expr: EXPR.NumberUnary) -> object:
+        right = expr.right.accept(self)
+        if type(right) is float:
+            return -right
+        # type miss: the node goes back to the generic path for good.
+        expr.__class__ = EXPR.Unary
+        return self.visitUnaryExpr(expr)
+
+    def visitNotUnaryExpr(self, expr: EXPR.NotUnary) -> object:
+        right = expr.right.accept(self)
+        return right is None or right is False
+
     def visitVariableExpr(self, expr: EXPR.Variable):
         # the type of expr.name is Token, you need to access its attribute lexeme to get the true variable name.
         return self.lookup_variable(expr.name, expr)
 
     def lookup_variable(self, name: Token, expr: EXPR.Expr):
-        distance = self.locals.get(expr, None)
-        if distance is not None:
-            return self.environment.get_at(distance, name.lexeme)
+        if expr.depth is not None:
+            return self.environment.get_at(expr.depth, expr.slot)
         else:
-            return self.globals.get(name.lexeme)
+            return self.globals.get_at(expr.slot, name)
     
     def evaluate(self, expr: EXPR.Expr) -> object:
         """
@@ -146,26 +197,21 @@ class Interpreter(Visitor):
         function = LoxFunction(expr, self.environment, False)
         return function
 
-    def visitIfStmt(self, stmt: STMT.If):
-        if self.is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.then_branch)
-        elif stmt.else_branch is not None:
-            self.execute(stmt.else_branch)
-
     def visitPrintStmt(self, stmt: STMT.Print):
         """
         Syntax:
             printStmt := "print" expression ";" ;
         """
         value = self.evaluate(stmt.expression)
-        print(self.stringify(value))
+        self.output.write(self.stringify(value))
     
     def visitReturnStmt(self, stmt: STMT.Return):
         value = None
         if stmt.value is not None:
             value = self.evaluate(stmt.value)
 
-        raise Return(value)
+        self.return_value = value
+        return RETURN
 
     def visitVarStmt(self, stmt: STMT.Var):
         value = None
@@ -176,62 +222,199 @@ class Interpreter(Visitor):
 
     def visitWhileStmt(self, stmt: STMT.While):
         while self.is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.body)
+            if stmt.body.accept(self) is not None:
+                return RETURN
+
+    def visitCountedLoopStmt(self, stmt: STMT.CountedLoop):
+        """
+        Run the desugared `for (var i = a; i < b; i = i + c) body` like the generic blocks would,
+        but keep the counter in a local, compare and step it directly while it is a number, and
+        reuse the frames of the loop body when no closure captures them.
+        """
+        declaration, loop = stmt.statements
+        statements = loop.body.statements
+        if not statements or type(statements[-1]) is not STMT.Expression:
+            # the optimizer removed the increment, dead after a `return` ending the body.
+            return self.visitBlockStmt(stmt)
+        condition = loop.condition
+        bound = condition.right
+        increment = statements[-1].expression.value
+        step = increment.right
+        body = statements[:-1]
+        compare = NUMBER_OPERATIONS[condition.operator.kind]
+        advance = NUMBER_OPERATIONS[increment.operator.kind]
+
+        previous = self.environment
+        environment = self.environment = Environment(previous)
+        try:
+            declaration.accept(self)
+            # the counter is the only variable of the loop block.
+            values = environment.values
+            # the block of the body and the increment declares no variable, one frame serves
+            # every iteration. The block of the body gets a new frame in every iteration only
+            # when a closure may keep it.
+            frame = Environment(environment)
+            inner = None
+            if len(body) == 1 and type(body[0]) is STMT.Block and not body[0].captured:
+                inner = Environment(frame)
+                body = body[0].statements
+
+            while True:
+                # the counter is read before the bound is evaluated, as by the condition.
+                counter = values[0]
+                self.environment = environment
+                limit = bound.accept(self)
+                if type(counter) is float and type(limit) is float:
+                    if not compare(counter, limit):
+                        break
+                elif not self.is_truthy(self.binary_operators[condition.operator.kind](
+                        self, condition.operator, counter, limit)):
+                    break
+
+                if inner is not None:
+                    # the body redefines its variables at the same slots.
+                    inner.values.clear()
+                    self.environment = inner
+                else:
+                    self.environment = frame
+                for statement in body:
+                    if statement.accept(self) is not None:
+                        return RETURN
+
+                # the body may have assigned the counter.
+                self.environment = frame
+                counter = values[0]
+                delta = step.accept(self)
+                if type(counter) is float and type(delta) is float:
+                    values[0] = advance(counter, delta)
+                else:
+                    values[0] = self.binary_operators[increment.operator.kind](
+                        self, increment.operator, counter, delta)
+        finally:
+            self.environment = previous
 
     def visitAssignExpr(self, expr: EXPR.Assign) -> object:
         value = self.evaluate(expr.value)
 
-        distance = self.locals.get(expr, None)
-        if distance is not None:
-            self.environment.assign_at(distance, expr.name, value)
+        if expr.depth is not None:
+            self.environment.assign_at(expr.depth, expr.slot, value)
         else:
-            self.globals.assign(expr.name, value)
+            self.globals.assign_at(expr.slot, expr.name, value)
         return value
 
     def visitIfStmt(self, stmt: STMT.If):
         if self.is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.then_branch)
+            return stmt.then_branch.accept(self)
         elif stmt.else_branch is not None:
-            self.execute(stmt.else_branch)
+            return stmt.else_branch.accept(self)
         return None
 
     def visitBinaryExpr(self, expr: EXPR.Binary) -> object:
         left = self.evaluate(expr.left)
         right = self.evaluate(expr.right)
+        value = self.binary_operators[expr.operator.kind](self, expr.operator, left, right)
+        if not expr.quickened:
+            self.quicken_binary(expr, left, right)
+        return value
 
-        if isinstance(expr.operator, GREATER):
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) > float(right)
-        elif isinstance(expr.operator, GREATER_EQUAL):
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) >= float(right)
-        elif isinstance(expr.operator, LESS):
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) < float(right)
-        elif isinstance(expr.operator, LESS_EQUAL):
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) <= float(right)
-        elif isinstance(expr.operator, MINUS):
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) - float(right)
-        elif isinstance(expr.operator, PLUS):
-            if isinstance(left, float) and isinstance(right, float):
-                return float(left) + float(right)
-            if isinstance(left, str) or isinstance(right, str):
-                return self.stringify(left) + self.stringify(right)
-        elif isinstance(expr.operator, SLASH):
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) / float(right)
-        elif isinstance(expr.operator, STAR):
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) * float(right)
-        elif isinstance(expr.operator, BANG_EQUAL):
-            return not self.is_equal(left,right)
-        elif isinstance(expr.operator, EQUAL_EQUAL):
-            return self.is_equal(left,right)
-        
+    def quicken_binary(self, expr: EXPR.Binary, left: object, right: object) -> None:
+        """
+        Rewrite `expr`, executed for the first time with the operands `left` and `right`, into
+        the variant specialised for their types. The variants guard the types and rewrite the
+        node back to the generic `Binary` on a miss, after which it is never specialised again.
+        """
+        expr.quickened = True
+        kind = expr.operator.kind
+        if kind in EQUALITY_OPERATIONS:
+            expr.operation = EQUALITY_OPERATIONS[kind]
+            expr.__class__ = EXPR.EqualityBinary
+        elif type(left) is float and type(right) is float:
+            expr.operation = NUMBER_OPERATIONS[kind]
+            expr.__class__ = EXPR.NumberBinary
+        elif kind == TokenType.PLUS and type(left) is str and type(right) is str:
+            expr.__class__ = EXPR.StringBinary
+
+    def visitNumberBinaryExpr(self, expr: EXPR.NumberBinary) -> object:
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        if type(left) is float and type(right) is float:
+            return expr.operation(left, right)
+        expr.__class__ = EXPR.Binary
+        return self.binary_operators[expr.operator.kind](self, expr.operator, left, right)
+
+    def visitStringBinaryExpr(self, expr: EXPR.StringBinary) -> object:
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        if type(left) is str and type(right) is str:
+            if len(left) + len(right) < ROPE_THRESHOLD:
+                return left + right
+            return concatenate(left, right)
+        expr.__class__ = EXPR.Binary
+        return self.plus(expr.operator, left, right)
+
+    def visitEqualityBinaryExpr(self, expr: EXPR.EqualityBinary) -> object:
+        return expr.operation(expr.left.accept(self), expr.right.accept(self))
+
+    def greater(self, operator: Token, left: object, right: object) -> object:
+        self.check_number_operands(operator, left, right)
+        return left > right
+
+    def greater_equal(self, operator: Token, left: object, right: object) -> object:
+        self.check_number_operands(operator, left, right)
+        return left >= right
+
+    def less(self, operator: Token, left: object, right: object) -> object:
+        self.check_number_operands(operator, left, right)
+        return left < right
+
+    def less_equal(self, operator: Token, left: object, right: object) -> object:
+        self.check_number_operands(operator, left, right)
+        return left <= right
+
+    def minus(self, operator: Token, left: object, right: object) -> object:
+        self.check_number_operands(operator, left, right)
+        return left - right
+
+    def plus(self, operator: Token, left: object, right: object) -> object:
+        if isinstance(left, float) and isinstance(right, float):
+            return left + right
+        left_string = isinstance(left, STRING_TYPES)
+        right_string = isinstance(right, STRING_TYPES)
+        if left_string or right_string:
+            return concatenate(
+                left if left_string else self.stringify(left),
+                right if right_string else self.stringify(right),
+            )
         return None
 
+    def slash(self, operator: Token, left: object, right: object) -> object:
+        self.check_number_operands(operator, left, right)
+        return left / right
+
+    def star(self, operator: Token, left: object, right: object) -> object:
+        self.check_number_operands(operator, left, right)
+        return left * right
+
+    def bang_equal(self, operator: Token, left: object, right: object) -> object:
+        return not self.is_equal(left, right)
+
+    def equal_equal(self, operator: Token, left: object, right: object) -> object:
+        return self.is_equal(left, right)
+
+    # dispatch table of binary operators, keyed by the kind of the operator token.
+    binary_operators = {
+        TokenType.GREATER: greater,
+        TokenType.GREATER_EQUAL: greater_equal,
+        TokenType.LESS: less,
+        TokenType.LESS_EQUAL: less_equal,
+        TokenType.MINUS: minus,
+        TokenType.PLUS: plus,
+        TokenType.SLASH: slash,
+        TokenType.STAR: star,
+        TokenType.BANG_EQUAL: bang_equal,
+        TokenType.EQUAL_EQUAL: equal_equal,
+    }
+
     def check_number_operand(self, operator: Token, operand: object) -> None:
         if isinstance(operand, float):
             return
@@ -256,30 +439,94 @@ class Interpreter(Visitor):
         # expr.callee is an instance of Expr. More specifically a Variable
         # if expr.callee is a valid identifier. The variable refering to
         # the function name will finally be evaluated to the function object itself.
+        if expr.callee.__class__ is EXPR.Get:
+            return self.invoke(expr, expr.callee)
         callee = self.evaluate(expr.callee)
         
         arguments = []
         for argument in expr.arguments:
             arguments.append(self.evaluate(argument))
         
-        if not isinstance(callee, LoxCallable):
-            raise PLoxRuntimeError(expr.paren, "Can only call functions and classes.")
-        
-        function = callee
+        self.check_call(expr, callee, arguments)
+        return callee.call(self, arguments)
+
+    def invoke(self, expr: EXPR.Call, get: EXPR.Get) -> object:
+        """
+        Call `object.method(...)` without creating the bound method: the receiver and the arguments
+        go straight into the frame of the method. Fields shadowing methods and the errors are
+        handled like when the property is got then called.
+        """
+        object = self.evaluate(get.object)
+        if not isinstance(object, LoxInstance):
+            raise PLoxRuntimeError(get.name, "Only instances have properties.")
+
+        if object.shape is not get.cache_shape:
+            self.cache_property(get, object)
+        if get.cache_index is not None:
+            callee = object.values[get.cache_index]
+        else:
+            method = get.cache_method
+            if method.__class__ is LoxFunction:
+                values = [object]
+                for argument in expr.arguments:
+                    values.append(self.evaluate(argument))
+                if len(values) - 1 != len(method.declaration.params):
+                    raise PLoxRuntimeError(expr.paren,
+                        f"Expected {len(method.declaration.params)} arguments but got {len(values) - 1}.")
+                return method.run(self, values)
+            callee = method.bind(object)
+
+        arguments = []
+        for argument in expr.arguments:
+            arguments.append(self.evaluate(argument))
+        self.check_call(expr, callee, arguments)
+        return callee.call(self, arguments)
+
+    def call(self, callee: LoxCallable, arguments: List[object]) -> object:
+        """
+        Call `callee` from Python, e.g. from a native function, and return its result.
+        """
+        return callee.call(self, arguments)
+
+    def check_call(self, expr: EXPR.Call, callee: object, arguments: List[object]) -> None:
+        # the arity of the callee of the previous call is cached on the node.
+        if callee is not expr.cache_callee or expr.cache_arity is None:
+            if not isinstance(callee, LoxCallable):
+                raise PLoxRuntimeError(expr.paren, "Can only call functions and classes.")
+            expr.cache_callee = callee
+            expr.cache_arity = callee.arity()
         
-        if len(arguments) != function.arity():
+        if len(arguments) != expr.cache_arity:
             raise PLoxRuntimeError(expr.paren,
-                f"Expected {function.arity()} arguments but got {len(arguments)}.")
-
-        return function.call(self, arguments)
+                f"Expected {expr.cache_arity} arguments but got {len(arguments)}.")
 
     def visitGetExpr(self, expr: EXPR.Get) -> object:
         object = self.evaluate(expr.object)
-        if isinstance(object, LoxInstance):
-            # FIXME: object has not attribute expr.name
-            return object.get(expr.name)
-        
-        raise PLoxRuntimeError(expr.name, "Only instances have properties.")
+        if not isinstance(object, LoxInstance):
+            raise PLoxRuntimeError(expr.name, "Only instances have properties.")
+
+        if object.shape is not expr.cache_shape:
+            self.cache_property(expr, object)
+        if expr.cache_index is not None:
+            return object.values[expr.cache_index]
+        return expr.cache_method.bind(object)
+
+    def cache_property(self, expr: EXPR.Get, instance: LoxInstance) -> None:
+        """
+        Cache on `expr` what its property is for the instances of the shape of `instance`: the
+        index of the field, or the method when there is no such field. A shape belongs to a single
+        class and has a fixed set of fields, so the cache holds as long as the shape is the same.
+        """
+        name = expr.name.lexeme
+        index = instance.shape.indices.get(name)
+        method = None
+        if index is None:
+            method = instance.klass.find_function(name)
+            if method is None:
+                raise PLoxRuntimeError(expr.name, f"Undefined property '{name}'.")
+        expr.cache_shape = instance.shape
+        expr.cache_index = index
+        expr.cache_method = method
 
     def visitSetExpr(self, expr: EXPR.Set) -> object:
         object = self.evaluate(expr.object)
@@ -288,20 +535,53 @@ class Interpreter(Visitor):
             raise PLoxRuntimeError(expr.name, "Only instances have fields.")
         
         value = self.evaluate(expr.value)
-        object.set(expr.name, value)
+        # the shape is read once the value is evaluated, which may have added fields to the object.
+        shape = object.shape
+        if shape is not expr.cache_shape:
+            expr.cache_shape = shape
+            expr.cache_index = shape.indices.get(expr.name.lexeme)
+            expr.cache_transition = shape.add(expr.name.lexeme) if expr.cache_index is None else None
+        if expr.cache_transition is None:
+            object.values[expr.cache_index] = value
+        else:
+            # a new field, appended to the values of the instance.
+            object.values.append(value)
+            object.shape = expr.cache_transition
         return value
 
     def visitSuperExpr(self, expr: EXPR.Super) -> None:
-        distance = self.locals.get(expr)
-        superclass = self.environment.get_at(distance, "super")
-        object = self.environment.get_at(distance-1, "this")
+        superclass = self.environment.get_at(expr.depth, expr.slot)
+        # "this" is the first variable of the frame of the method, right inside the "super" one.
+        object = self.environment.get_at(expr.depth-1, 0)
+        if superclass is expr.cache_class:
+            return expr.cache_method.bind(object)
+
         method = superclass.find_function(expr.method.lexeme)
         if method is None:
             raise PLoxRuntimeError(expr.method, f"Undefined property '{expr.method.lexeme }'.")
-        
+        expr.cache_class = superclass
+        expr.cache_method = method
         return method.bind(object)
 
     def visitThisExpr(self, expr: EXPR.This) -> object:
         return self.lookup_variable(expr.keyword, expr)
 
-    
\ No newline at end of file
+
+"""
+Python operators of the quickened `Binary` variants, by operator kind. `is_equal` is Python's
+`==`, nil being None.
+"""
+NUMBER_OPERATIONS = {
+    TokenType.GREATER: operator.gt,
+    TokenType.GREATER_EQUAL: operator.ge,
+    TokenType.LESS: operator.lt,
+    TokenType.LESS_EQUAL: operator.le,
+    TokenType.MINUS: operator.sub,
+    TokenType.PLUS: operator.add,
+    TokenType.SLASH: operator.truediv,
+    TokenType.STAR: operator.mul,
+}
+EQUALITY_OPERATIONS = {
+    TokenType.EQUAL_EQUAL: operator.eq,
+    TokenType.BANG_EQUAL: operator.ne,
+}
@@ -1,6 +1,9 @@
+from collections import OrderedDict
 from typing import List
 from abc import ABC, abstractmethod
 from time import time
+from plox.error import PLoxRuntimeError
+from plox.syntax.loxstring import Rope
 
 
 class LoxCallable(ABC):
@@ -27,4 +30,86 @@ class Clock(LoxCallable):
         return 0
 
     def __str__(self):
-        return "<native fn>"
\ No newline at end of file
+        return "<native fn>"
+
+
+"""
+Default number of results kept by a memoized function.
+"""
+MEMO_SIZE = 1024
+"""
+Types of the arguments a memoized function caches its results for, a call with any other
+argument, e.g. an instance, is not cached.
+"""
+MEMO_TYPES = (float, str, bool, type(None))
+
+
+class Memoize(LoxCallable):
+    """
+    `memoize(fn)`: return `fn` caching its results by arguments, in a LRU cache holding the
+    last `interpreter.memo_size` results. Only meant for pure functions.
+    """
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+
+    def call(self, interpreter, arguments: List[object]):
+        from plox.syntax.loxclass import LoxClass
+        function = arguments[0]
+        if not isinstance(function, LoxCallable) or isinstance(function, LoxClass):
+            raise PLoxRuntimeError(None, "Can only memoize functions.")
+        return Memoized(function, self.interpreter, self.interpreter.memo_size)
+
+    def arity(self):
+        return 1
+
+    def __str__(self):
+        return "<native fn>"
+
+
+class Memoized(LoxCallable):
+    """
+    A function wrapped by `memoize`. The hits and misses of its cache are counted on the
+    function and in the stats of the interpreter.
+    """
+    def __init__(self, function: LoxCallable, interpreter, size: int):
+        self.function = function
+        self.interpreter = interpreter
+        self.size = size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def call(self, interpreter, arguments: List[object]):
+        # some engines call natives without the interpreter, the one that created the function is kept.
+        interpreter = self.interpreter
+        types = tuple(map(type, arguments))
+        if Rope in types:
+            # a rope is the same Lox string as its text, they share the cache entries.
+            arguments = [str(argument) if type(argument) is Rope else argument for argument in arguments]
+            types = tuple(map(type, arguments))
+        for kind in types:
+            if kind not in MEMO_TYPES:
+                return interpreter.call(self.function, arguments)
+
+        # 1.0 == true in Python, the types are part of the key.
+        key = (types, tuple(arguments))
+        cache = self.cache
+        if key in cache:
+            cache.move_to_end(key)
+            self.hits += 1
+            interpreter.stats["memoize hits"] += 1
+            return cache[key]
+
+        self.misses += 1
+        interpreter.stats["memoize misses"] += 1
+        value = interpreter.call(self.function, arguments)
+        cache[key] = value
+        if len(cache) > self.size:
+            cache.popitem(last=False)
+        return value
+
+    def arity(self):
+        return self.function.arity()
+
+    def __str__(self):
+        return str(self.function)
@@ -1,36 +1,54 @@
 from typing import List, Dict
 from plox.syntax.loxfunction import LoxFunction
 from plox.syntax.loxcallable import LoxCallable
+from plox.syntax.loxinstance import Shape
 
 
 
 class LoxClass(LoxCallable):
+    """
+    A Lox class. Besides its own `methods`, the class keeps a flattened `method_table` holding
+    the inherited methods too, so looking a method up never walks the superclass chain.
+    """
     def __init__(self, name: str, superclass, methods: Dict[str, LoxFunction]):
         self.superclass = superclass
         self.name = name
         self.methods = methods
+        self.method_table = dict(superclass.method_table) if superclass is not None else dict()
+        self.method_table.update(methods)
+        self.initializer = self.method_table.get("init")
+        # shape of the instances without fields, the root of the shapes of the instances of the class.
+        self.root_shape = Shape()
+
+    def inherit(self, superclass: "LoxClass") -> None:
+        """
+        Make `superclass` the superclass of the class, before any method is added.
+        """
+        self.superclass = superclass
+        self.method_table.update(superclass.method_table)
+        self.initializer = self.method_table.get("init")
+
+    def add_method(self, name: str, method: LoxCallable) -> None:
+        self.methods[name] = method
+        self.method_table[name] = method
+        if name == "init":
+            self.initializer = method
     
     def find_function(self, name: str):
-        if name in self.methods:
-            return self.methods[name]
-
-        if self.superclass is not None:
-            return self.superclass.find_function(name)
-        
-        return None
+        return self.method_table.get(name)
 
     def call(self, interpreter, arguments: List[object]):
         from plox.syntax.loxinstance import LoxInstance
         instance = LoxInstance(self)
         
-        initializer = self.find_function("init")
-        if initializer:
+        initializer = self.initializer
+        if initializer is not None:
             initializer.bind(instance).call(interpreter, arguments)
         
         return instance
 
     def arity(self):
-        initializer = self.find_function("init")
+        initializer = self.initializer
         if initializer is None: return 0
         return initializer.arity()
 
@@ -2,32 +2,42 @@ from typing import List
 from plox.syntax.loxcallable import LoxCallable
 from plox.syntax import stmt
 from plox.syntax.environment import Environment
-from plox.syntax.ret import Return
+from plox.syntax.ret import RETURN
 from plox.syntax.loxinstance import LoxInstance
 
 
 class LoxFunction(LoxCallable):
-    def __init__(self, declaration: stmt.Function, closure: Environment, is_initializer: bool = False):
+    """
+    A Lox function or method. The frame of a call holds the receiver of a method in its first
+    slot, "this", followed by the arguments.
+    """
+    def __init__(self, declaration: stmt.Function, closure: Environment, is_initializer: bool = False,
+                 receiver: LoxInstance = None):
         self.declaration = declaration
         self.closure = closure
         self.is_initializer = is_initializer
+        # the instance a method is bound to, None for a function.
+        self.receiver = receiver
 
-    def bind(self, instance: LoxInstance) -> None:
-        environment = Environment(self.closure)
-        environment.define("this", instance)
-        return LoxFunction(self.declaration, environment, self.is_initializer)
+    def bind(self, instance: LoxInstance) -> "LoxFunction":
+        return LoxFunction(self.declaration, self.closure, self.is_initializer, instance)
 
     def call(self, interpreter, arguments: List[object]) -> object:
-        # environment = Environment(self.closure)
+        if self.receiver is None:
+            return self.run(interpreter, arguments)
+        return self.run(interpreter, [self.receiver, *arguments])
+
+    def run(self, interpreter, values: List[object]) -> object:
+        """
+        Execute the body in a new frame holding `values`: the receiver of a method if any, then the
+        arguments. The Interpreter calls it directly to invoke a method without binding it first.
+        """
         environment = Environment(self.closure)
-        for i in range(len(self.declaration.params)):
-            environment.define(self.declaration.params[i].lexeme, arguments[i])
-        try:
-            interpreter.execute_block(self.declaration.body, environment)
-        except Return as return_value:
+        environment.values = values
+        if interpreter.execute_block(self.declaration.body, environment) is RETURN:
             if self.is_initializer:
-                return self.closure.get_at(0, "this")
-            return return_value.value
+                return values[0]
+            return interpreter.return_value
         
         return None
 
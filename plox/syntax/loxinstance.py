@@ -1,24 +1,74 @@
+from typing import Dict
 from plox.lexer.token import Token
 from plox.error import PLoxRuntimeError
 
 
+class Shape:
+    """
+    Hidden class of the instances which got the same fields in the same order, shared by all of
+    them. The shape maps every field name to its index in the `values` of the instances, so an
+    instance only stores its field values, and the shape of an instance tells which fields it has.
+
+    Adding a field moves an instance to the shape with that field appended, the transitions are
+    cached so that the instances built the same way end up with the same shape. Every class has
+    its own empty shape, so a shape also tells the class of the instance.
+    """
+    __slots__ = ("indices", "transitions")
+
+    def __init__(self, indices: Dict[str, int] = None):
+        self.indices = indices if indices is not None else dict()
+        self.transitions: Dict[str, Shape] = dict()
+
+    def add(self, name: str) -> "Shape":
+        """
+        Return the shape of the instances of this shape which got the new field `name`.
+        """
+        shape = self.transitions.get(name)
+        if shape is None:
+            indices = dict(self.indices)
+            indices[name] = len(indices)
+            shape = self.transitions[name] = Shape(indices)
+        return shape
+
+
 class LoxInstance:
+    __slots__ = ("klass", "shape", "values")
+
     def __init__(self, klass):
         self.klass = klass
-        self.fields = dict()
+        self.shape = klass.root_shape
+        # the values of the fields, at the indices given by the shape.
+        self.values = []
 
     def get(self, name: Token) -> object:
-        if name.lexeme in self.fields:
-            return self.fields[name.lexeme]
+        index = self.shape.indices.get(name.lexeme)
+        if index is not None:
+            return self.values[index]
 
         method = self.klass.find_function(name.lexeme)
-        if method is not None: 
+        if method is not None:
             return method.bind(self)
-        
+
         raise PLoxRuntimeError(name, "Undefined property '" + name.lexeme + "'.")
 
     def set(self, name: Token, value: object) -> None:
-        self.fields[name.lexeme] = value
+        self.set_field(name.lexeme, value)
+
+    def set_field(self, name: str, value: object) -> None:
+        index = self.shape.indices.get(name)
+        if index is None:
+            self.shape = self.shape.add(name)
+            self.values.append(value)
+        else:
+            self.values[index] = value
+
+    @property
+    def fields(self) -> Dict[str, object]:
+        """
+        The fields of the instance by name, a copy.
+        """
+        values = self.values
+        return {name: values[index] for name, index in self.shape.indices.items()}
 
     def __repr__(self):
-        return f"{self.klass} instance"
\ No newline at end of file
+        return f"{self.klass} instance"
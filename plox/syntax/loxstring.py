@@ -0,0 +1,69 @@
+from typing import List
+
+
+# strings shorter than this are concatenated right away, copying them is cheaper than a rope.
+ROPE_THRESHOLD = 256
+
+
+class Rope:
+    """
+    Lox string built by concatenation, kept as the list of its pieces and only joined into a
+    Python string when it is printed, compared or hashed, see `__str__`.
+
+    Appending to a rope appends the piece to the list of pieces it shares with the rope it was
+    built from, so `s = s + piece` in a loop is linear instead of copying `s` every time. A rope
+    only reads the first `count` pieces of the list, the ropes it was built from are unchanged;
+    appending to a rope which is not the last built from its list copies the list first.
+    """
+    __slots__ = ("pieces", "count", "length", "flat")
+
+    def __init__(self, pieces: List[str], count: int, length: int):
+        self.pieces = pieces
+        self.count = count
+        self.length = length
+        # the joined string, once it was needed.
+        self.flat = None
+
+    def append(self, piece: str) -> "Rope":
+        pieces = self.pieces
+        if len(pieces) != self.count:
+            pieces = pieces[:self.count]
+        pieces.append(piece)
+        return Rope(pieces, self.count + 1, self.length + len(piece))
+
+    def __str__(self) -> str:
+        flat = self.flat
+        if flat is None:
+            flat = self.flat = "".join(self.pieces[:self.count])
+        return flat
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is str or type(other) is Rope:
+            return self.length == len(other) and str(self) == str(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    def __repr__(self) -> str:
+        return repr(str(self))
+
+
+# the types of the Lox strings.
+STRING_TYPES = (str, Rope)
+
+
+def concatenate(left: object, right: object) -> object:
+    """
+    Concatenate the Lox strings `left` and `right`, into a rope once the result is long.
+    """
+    if type(right) is Rope:
+        right = str(right)
+    if type(left) is Rope:
+        return left.append(right)
+    if len(left) + len(right) < ROPE_THRESHOLD:
+        return left + right
+    return Rope([left, right], 2, len(left) + len(right))
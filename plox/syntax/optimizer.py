@@ -0,0 +1,271 @@
+from typing import Dict, List, Optional, Sequence
+from plox.syntax import Visitor
+from plox.syntax import expr as EXPR
+from plox.syntax import stmt as STMT
+from plox.lexer.token import *
+from plox.error import PLoxRuntimeError
+from plox.syntax.interpreter import Interpreter
+from plox.syntax.loxstring import Rope
+
+
+class OptimizationPass(Visitor):
+    """
+    Base class of the passes run by the Optimizer between the Resolver and the Interpreter.
+
+    A pass visits the tree and every visitor method returns the node replacing the visited one.
+    Children are rewritten in place and the Variable, Assign, This and Super nodes are never
+    replaced, so the depths and slots recorded on them by the Resolver remain valid.
+    A statement visitor returns None to remove the statement.
+
+    The default visitor methods only rewrite the children, subclasses override the methods of
+    the nodes they optimize.
+    """
+    def run(self, statements: List[STMT.Stmt]) -> List[STMT.Stmt]:
+        return self.statements(statements)
+
+    def statements(self, statements: List[STMT.Stmt]) -> List[STMT.Stmt]:
+        result = []
+        for statement in statements:
+            statement = statement.accept(self)
+            if statement is not None:
+                result.append(statement)
+        return result
+
+    def statement(self, statement: STMT.Stmt) -> STMT.Stmt:
+        """
+        Rewrite a statement that can't be removed, e.g. the body of a loop.
+        """
+        statement = statement.accept(self)
+        return statement if statement is not None else STMT.Block([])
+
+    def expression(self, expr: EXPR.Expr) -> EXPR.Expr:
+        return expr.accept(self)
+
+    def visitBlockStmt(self, stmt: STMT.Block) -> STMT.Stmt:
+        stmt.statements = self.statements(stmt.statements)
+        return stmt
+
+    def visitClassStmt(self, stmt: STMT.Class) -> STMT.Stmt:
+        for method in stmt.methods:
+            method.accept(self)
+        return stmt
+
+    def visitExpressionStmt(self, stmt: STMT.Expression) -> STMT.Stmt:
+        stmt.expression = self.expression(stmt.expression)
+        return stmt
+
+    def visitFunctionStmt(self, stmt: STMT.Function) -> STMT.Stmt:
+        stmt.body = self.statements(stmt.body)
+        return stmt
+
+    def visitIfStmt(self, stmt: STMT.If) -> STMT.Stmt:
+        stmt.condition = self.expression(stmt.condition)
+        stmt.then_branch = self.statement(stmt.then_branch)
+        if stmt.else_branch is not None:
+            stmt.else_branch = stmt.else_branch.accept(self)
+        return stmt
+
+    def visitPrintStmt(self, stmt: STMT.Print) -> STMT.Stmt:
+        stmt.expression = self.expression(stmt.expression)
+        return stmt
+
+    def visitReturnStmt(self, stmt: STMT.Return) -> STMT.Stmt:
+        if stmt.value is not None:
+            stmt.value = self.expression(stmt.value)
+        return stmt
+
+    def visitVarStmt(self, stmt: STMT.Var) -> STMT.Stmt:
+        if stmt.initializer is not None:
+            stmt.initializer = self.expression(stmt.initializer)
+        return stmt
+
+    def visitWhileStmt(self, stmt: STMT.While) -> STMT.Stmt:
+        stmt.condition = self.expression(stmt.condition)
+        stmt.body = self.statement(stmt.body)
+        return stmt
+
+    def visitAssignExpr(self, expr: EXPR.Assign) -> EXPR.Expr:
+        expr.value = self.expression(expr.value)
+        return expr
+
+    def visitBinaryExpr(self, expr: EXPR.Binary) -> EXPR.Expr:
+        expr.left = self.expression(expr.left)
+        expr.right = self.expression(expr.right)
+        return expr
+
+    def visitCallExpr(self, expr: EXPR.Call) -> EXPR.Expr:
+        expr.callee = self.expression(expr.callee)
+        expr.arguments = [self.expression(argument) for argument in expr.arguments]
+        return expr
+
+    def visitGetExpr(self, expr: EXPR.Get) -> EXPR.Expr:
+        expr.object = self.expression(expr.object)
+        return expr
+
+    def visitGroupingExpr(self, expr: EXPR.Grouping) -> EXPR.Expr:
+        expr.expression = self.expression(expr.expression)
+        return expr
+
+    def visitLambdaExpr(self, expr: EXPR.Lambda) -> EXPR.Expr:
+        expr.body = self.statements(expr.body)
+        return expr
+
+    def visitLiteralExpr(self, expr: EXPR.Literal) -> EXPR.Expr:
+        return expr
+
+    def visitLogicalExpr(self, expr: EXPR.Logical) -> EXPR.Expr:
+        expr.left = self.expression(expr.left)
+        expr.right = self.expression(expr.right)
+        return expr
+
+    def visitSetExpr(self, expr: EXPR.Set) -> EXPR.Expr:
+        expr.object = self.expression(expr.object)
+        expr.value = self.expression(expr.value)
+        return expr
+
+    def visitSuperExpr(self, expr: EXPR.Super) -> EXPR.Expr:
+        return expr
+
+    def visitThisExpr(self, expr: EXPR.This) -> EXPR.Expr:
+        return expr
+
+    def visitUnaryExpr(self, expr: EXPR.Unary) -> EXPR.Expr:
+        expr.right = self.expression(expr.right)
+        return expr
+
+    def visitVariableExpr(self, expr: EXPR.Variable) -> EXPR.Expr:
+        return expr
+
+
+class GroupingElimination(OptimizationPass):
+    """
+    Replace every `Grouping` by the expression it wraps, the parentheses only matter to the parser.
+    """
+    def visitGroupingExpr(self, expr: EXPR.Grouping) -> EXPR.Expr:
+        return self.expression(expr.expression)
+
+
+class ConstantFolding(OptimizationPass):
+    """
+    Evaluate the `Unary`, `Binary`, `Logical` and `Grouping` expressions whose operands are all
+    literals, replacing them by a `Literal`. The operators are evaluated by the Interpreter itself
+    so the semantics are identical; an expression that would raise at runtime, e.g. `"a" - 1`
+    or a division by zero, is left as it is so the error is still raised when it is executed.
+    """
+    def __init__(self):
+        self.interpreter = Interpreter()
+
+    def visitBinaryExpr(self, expr: EXPR.Binary) -> EXPR.Expr:
+        super().visitBinaryExpr(expr)
+        if not isinstance(expr.left, EXPR.Literal) or not isinstance(expr.right, EXPR.Literal):
+            return expr
+
+        operation = self.interpreter.binary_operators[expr.operator.kind]
+        try:
+            value = operation(self.interpreter, expr.operator, expr.left.value, expr.right.value)
+        except (PLoxRuntimeError, ArithmeticError):
+            return expr
+        # a long string is built as a rope, the literal holds the plain string.
+        if type(value) is Rope:
+            value = str(value)
+        return EXPR.Literal(value)
+
+    def visitUnaryExpr(self, expr: EXPR.Unary) -> EXPR.Expr:
+        super().visitUnaryExpr(expr)
+        if not isinstance(expr.right, EXPR.Literal):
+            return expr
+
+        value = expr.right.value
+        if expr.operator.kind == TokenType.BANG:
+            return EXPR.Literal(not self.interpreter.is_truthy(value))
+        if expr.operator.kind == TokenType.MINUS and isinstance(value, float):
+            return EXPR.Literal(-value)
+        return expr
+
+    def visitLogicalExpr(self, expr: EXPR.Logical) -> EXPR.Expr:
+        super().visitLogicalExpr(expr)
+        if not isinstance(expr.left, EXPR.Literal):
+            return expr
+
+        # the left operand decides whether the right one is evaluated, not whether it is a literal.
+        truthy = self.interpreter.is_truthy(expr.left.value)
+        if expr.operator.kind == TokenType.OR:
+            return expr.left if truthy else expr.right
+        return expr.right if truthy else expr.left
+
+    def visitGroupingExpr(self, expr: EXPR.Grouping) -> EXPR.Expr:
+        super().visitGroupingExpr(expr)
+        if isinstance(expr.expression, EXPR.Literal):
+            return expr.expression
+        return expr
+
+
+class BranchPruning(OptimizationPass):
+    """
+    Remove the branches of `If` and the `While` loops whose condition is a constant that
+    never selects them. Run it after `ConstantFolding` to prune conditions like `1 > 2`.
+    """
+    def __init__(self):
+        self.interpreter = Interpreter()
+
+    def visitIfStmt(self, stmt: STMT.If) -> Optional[STMT.Stmt]:
+        super().visitIfStmt(stmt)
+        if not isinstance(stmt.condition, EXPR.Literal):
+            return stmt
+
+        if self.interpreter.is_truthy(stmt.condition.value):
+            return stmt.then_branch
+        return stmt.else_branch
+
+    def visitWhileStmt(self, stmt: STMT.While) -> Optional[STMT.Stmt]:
+        super().visitWhileStmt(stmt)
+        if isinstance(stmt.condition, EXPR.Literal) and not self.interpreter.is_truthy(stmt.condition.value):
+            return None
+        return stmt
+
+
+class DeadCodeElimination(OptimizationPass):
+    """
+    Remove the statements following a `return` in the same block, they can never be executed.
+    """
+    def statements(self, statements: List[STMT.Stmt]) -> List[STMT.Stmt]:
+        statements = super().statements(statements)
+        for i, statement in enumerate(statements):
+            if isinstance(statement, STMT.Return):
+                return statements[:i+1]
+        return statements
+
+
+"""
+Registry of the optimization passes by name, and the passes enabled by each `-O` level.
+The passes are run in the listed order.
+"""
+PASSES: Dict[str, type] = {
+    "grouping": GroupingElimination,
+    "fold": ConstantFolding,
+    "prune": BranchPruning,
+    "dce": DeadCodeElimination,
+}
+
+OPTIMIZATION_LEVELS: Dict[int, List[str]] = {
+    0: [],
+    1: ["grouping", "fold"],
+    2: ["grouping", "fold", "prune", "dce"],
+}
+
+
+class Optimizer:
+    def __init__(self, passes: Sequence[str] = ()):
+        """
+        Args:
+            passes: names of the passes in `PASSES` to run, in order.
+        """
+        for name in passes:
+            if name not in PASSES:
+                raise ValueError(f"Unknown optimization pass '{name}', expected one of {', '.join(PASSES)}.")
+        self.passes = list(passes)
+
+    def optimize(self, statements: List[STMT.Stmt]) -> List[STMT.Stmt]:
+        for name in self.passes:
+            statements = PASSES[name]().run(statements)
+        return statements
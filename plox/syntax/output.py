@@ -0,0 +1,81 @@
+import sys
+from typing import List, TextIO
+
+
+# default size of the output buffer, in characters.
+OUTPUT_SIZE = 1 << 16
+
+"""
+When the output buffer is written out: "line" after every line, "full" once `size` characters
+are buffered, "auto" after every line when the stream is a terminal and when full otherwise.
+The buffer is also flushed when the program ends, before a runtime error is reported and
+before the REPL prompts for the next line.
+"""
+FLUSH_POLICIES = ("auto", "line", "full")
+
+
+class Output:
+    """
+    Buffered sink of the lines printed by the Lox `print` statement.
+
+    Writing every line to the stream costs a system call per line when the stream is a pipe or a
+    file, the lines are joined and written at once instead. `stream` is the stream written to,
+    None writes to the current `sys.stdout`.
+    """
+    def __init__(self, size: int = OUTPUT_SIZE, policy: str = "auto", stream: TextIO = None):
+        if policy not in FLUSH_POLICIES:
+            raise ValueError(f"Unknown flush policy {policy!r}, expected one of {', '.join(FLUSH_POLICIES)}.")
+        self.size = size
+        self.policy = policy
+        self.stream = stream
+        if policy == "auto":
+            isatty = getattr(stream or sys.stdout, "isatty", None)
+            policy = "line" if isatty is not None and isatty() else "full"
+        # the buffer is flushed once it holds more than `limit` characters.
+        self.limit = 0 if policy == "line" else size
+        self.lines: List[str] = []
+        self.length = 0
+
+    def write(self, line: str) -> None:
+        """
+        Write `line` followed by a newline.
+        """
+        self.lines.append(line)
+        self.length += len(line) + 1
+        if self.length > self.limit:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the buffered lines out to the stream.
+        """
+        if not self.lines:
+            return
+        lines = self.lines
+        self.lines = []
+        self.length = 0
+        lines.append("")
+        stream = self.stream or sys.stdout
+        stream.write("\n".join(lines))
+        stream.flush()
+
+
+# the text of the small integral numbers, most of the numbers printed.
+SMALL_INTEGERS = {float(i): str(i) for i in range(-1024, 1025) if i != 0}
+
+
+def format_number(value: float) -> str:
+    """
+    Format the Lox number `value`, without the ".0" Python gives integral floats.
+    """
+    text = SMALL_INTEGERS.get(value)
+    if text is not None:
+        return text
+    # below 1e16 Python formats the integral floats without an exponent, as their int does.
+    # 0.0 is left to `str`, which keeps the sign of -0.0.
+    if value.is_integer() and -1e16 < value < 1e16 and value != 0.0:
+        return str(int(value))
+    text = str(value)
+    if text.endswith(".0"):
+        text = text[:len(text)-2]
+    return text
@@ -1,10 +1,43 @@
-from typing import List
+from typing import Iterable, Iterator, List
 from plox.error import error, PLoxRuntimeError, runtime_error
 from plox.lexer.token import *
 from plox.syntax.expr import *
 from plox.syntax import stmt
 
 
+"""
+Kinds of the tokens starting a statement, where the parser resumes after a syntax error.
+"""
+STATEMENT_KEYWORDS = {
+    TokenType.CLASS,
+    TokenType.FUN,
+    TokenType.VAR,
+    TokenType.FOR,
+    TokenType.IF,
+    TokenType.WHILE,
+    TokenType.PRINT,
+    TokenType.RETURN,
+}
+
+
+"""
+Kinds of the comparison operators, the condition of a counted `for` loop.
+"""
+COMPARISONS = {
+    TokenType.GREATER,
+    TokenType.GREATER_EQUAL,
+    TokenType.LESS,
+    TokenType.LESS_EQUAL,
+}
+
+
+class ParseError(RuntimeError):
+    """
+    Raised to unwind the parser to the enclosing declaration after a syntax error was reported.
+    """
+    pass
+
+
 class Parser:
     def __init__(self):
         """
@@ -13,48 +46,60 @@ class Parser:
         whereas for expression, the entrance method is expression(), the return value being Expr.
         They are both used by the interpreter for executing.
 
-        Args:
-            tokens: lexical tokens generated by the lexical scanner.
-        
+        The tokens are consumed incrementally from an iterator, the parser only keeps the
+        current token (the one-token lookahead) and the previous one. So a lazy token
+        generator, e.g. `Scanner.iter_tokens`, is never materialised as a whole list.
+
         Attributes:
-            current: pointer point to the next token waiting to be parsed.
+            tokens: iterator over the lexical tokens generated by the lexical scanner.
+            current_token: the next token waiting to be parsed.
+            previous_token: the most recently consumed token.
         """
         self.tokens = None
-        self.current = 0
+        self.current_token = None
+        self.previous_token = None
+
+    def parse(self, tokens: Iterable[Token]) -> List[stmt.Stmt]:
+        return list(self.parse_iter(tokens))
+
+    def parse_iter(self, tokens: Iterable[Token]) -> Iterator[stmt.Stmt]:
+        """
+        Parse the tokens, yielding each top-level declaration as soon as it is parsed.
+        """
+        self.tokens = iter(tokens)
+        self.current_token = next(self.tokens)
 
-    def parse(self, tokens: List[Token]):
-        self.tokens = tokens
-        
-        statements = []
         while not self.is_end():
-            statements.append(self.declaration())
-        
-        return statements
+            yield self.declaration()
 
     def peek(self):
-        return self.tokens[self.current]
+        return self.current_token
 
     def is_end(self):
-        return isinstance(self.peek(), EOF)
+        return self.current_token.kind == TokenType.EOF
     
     def previous(self):
-        return self.tokens[self.current-1]
+        return self.previous_token
 
     def advance(self):
-        if not self.is_end(): self.current += 1
-        return self.previous()
+        if not self.is_end():
+            self.previous_token = self.current_token
+            self.current_token = next(self.tokens)
+        return self.previous_token
 
     def check(self, token_type: Token):
         """
-        Check whether the current token is an instance of token_type.
+        Check whether the current token is of the same kind as token_type.
         Return false if currently is at the end. 
         """
-        if self.is_end(): return False
-        return isinstance(self.peek(), token_type)
+        kind = self.current_token.kind
+        return kind != TokenType.EOF and kind == token_type.kind
 
     def match(self, *token_types):
+        kind = self.current_token.kind
+        if kind == TokenType.EOF: return False
         for token_type in token_types:
-            if self.check(token_type):
+            if kind == token_type.kind:
                 self.advance()
                 return True
         return False
@@ -63,7 +108,29 @@ class Parser:
         if self.check(token_type):
             return self.advance()
 
-        error(self.peek().line, message)
+        raise self.parse_error(self.peek().line, message)
+
+    def parse_error(self, line: int, message: str) -> ParseError:
+        """
+        Report a syntax error and return the ParseError to raise. The error is only returned
+        when errors are collected (see `plox.error.collect_errors`), otherwise reporting it
+        terminates the process.
+        """
+        error(line, message)
+        return ParseError(message)
+
+    def synchronize(self):
+        """
+        Discard tokens until the start of the next statement, so that parsing can go on after a
+        syntax error and report the errors of the following statements as well.
+        """
+        self.advance()
+        while not self.is_end():
+            if self.previous().kind == TokenType.SEMICOLON:
+                return
+            if self.peek().kind in STATEMENT_KEYWORDS:
+                return
+            self.advance()
 
     def declaration(self):
         """
@@ -80,8 +147,9 @@ class Parser:
                 return self.class_declaration()
             
             return self.statement()
-        except:
-            pass
+        except ParseError:
+            self.synchronize()
+            return None
 
     def class_declaration(self):
         """
@@ -228,10 +296,29 @@ class Parser:
         body = stmt.While(condition, body)
 
         if initializer is not None:
-            body = stmt.Block([initializer, body])
+            if increment is not None and self.is_counted_loop(initializer, condition, increment):
+                body = stmt.CountedLoop([initializer, body])
+            else:
+                body = stmt.Block([initializer, body])
 
         return body
 
+    def is_counted_loop(self, initializer: stmt.Stmt, condition: Expr, increment: Expr) -> bool:
+        """
+        Whether the clauses of a `for` loop have the shape `var i = a; i < b; i = i + c`, with any
+        comparison in the condition and `+` or `-` in the increment.
+        """
+        if type(initializer) is not stmt.Var:
+            return False
+        name = initializer.name.lexeme
+        return (
+            type(condition) is Binary and condition.operator.kind in COMPARISONS
+            and type(condition.left) is Variable and condition.left.name.lexeme == name
+            and type(increment) is Assign and increment.name.lexeme == name
+            and type(increment.value) is Binary and increment.value.operator.kind in (TokenType.PLUS, TokenType.MINUS)
+            and type(increment.value.left) is Variable and increment.value.left.name.lexeme == name
+        )
+
     def print_statement(self):
         """
         printStmt := "print" expression ";" ;
@@ -285,7 +372,7 @@ class Parser:
             return stmt.Function(name, parameters, body)
         
         else:
-            error(name.line, f"Expect '(' or '=' after {kind} name.")
+            raise self.parse_error(name.line, f"Expect '(' or '=' after {kind} name.")
 
 
     def expression(self) -> Expr:
@@ -506,5 +593,5 @@ class Parser:
             self.consume(RIGHT_PAREN, "Expect ')' after expression.")
             return Grouping(expr)
         # raise RuntimeError("Expect expression")
-        error(self.peek().line, "Expect expression.")        
+        raise self.parse_error(self.peek().line, "Expect expression.")
     
\ No newline at end of file
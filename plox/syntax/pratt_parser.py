@@ -0,0 +1,158 @@
+from plox.lexer.token import *
+from plox.syntax.expr import *
+from plox.syntax.parser import Parser
+
+
+"""
+Binding powers of the binary and postfix operators, from the loosest to the tightest.
+"""
+PREC_NONE = 0
+PREC_OR = 1
+PREC_AND = 2
+PREC_EQUALITY = 3
+PREC_COMPARISON = 4
+PREC_TERM = 5
+PREC_FACTOR = 6
+PREC_UNARY = 7
+PREC_CALL = 8
+
+
+INFIX_PRECEDENCE = {
+    TokenType.OR: PREC_OR,
+    TokenType.AND: PREC_AND,
+    TokenType.BANG_EQUAL: PREC_EQUALITY,
+    TokenType.EQUAL_EQUAL: PREC_EQUALITY,
+    TokenType.GREATER: PREC_COMPARISON,
+    TokenType.GREATER_EQUAL: PREC_COMPARISON,
+    TokenType.LESS: PREC_COMPARISON,
+    TokenType.LESS_EQUAL: PREC_COMPARISON,
+    TokenType.MINUS: PREC_TERM,
+    TokenType.PLUS: PREC_TERM,
+    TokenType.SLASH: PREC_FACTOR,
+    TokenType.STAR: PREC_FACTOR,
+    TokenType.LEFT_PAREN: PREC_CALL,
+    TokenType.DOT: PREC_CALL,
+}
+
+
+class PrattParser(Parser):
+    """
+    Parser whose expressions below assignment are parsed by a table-driven Pratt parser.
+
+    The recursive-descent `Parser` climbs through one method per precedence level, so every
+    primary expression costs ten nested calls. Here a single `parse_precedence` loop looks the
+    current token kind up in the prefix and infix tables instead. Statements, assignment and
+    lambda are inherited from `Parser`, and the resulting AST is identical.
+    """
+    def logic_or(self):
+        return self.parse_precedence(PREC_OR)
+
+    def parse_precedence(self, precedence: int) -> Expr:
+        """
+        Parse an expression whose operators bind at least as tight as `precedence`.
+        """
+        prefix = self.prefix_parselets.get(self.current_token.kind)
+        if prefix is None:
+            raise self.parse_error(self.peek().line, "Expect expression.")
+        expr = prefix(self)
+
+        while True:
+            token = self.current_token
+            infix_precedence = INFIX_PRECEDENCE.get(token.kind, PREC_NONE)
+            if infix_precedence < precedence or infix_precedence == PREC_NONE:
+                return expr
+            self.advance()
+            expr = self.infix_parselets[token.kind](self, expr, token, infix_precedence)
+
+    """
+    Prefix parselets, each is called with the first token of the expression not consumed yet.
+    """
+
+    def prefix_literal(self) -> Expr:
+        return Literal(self.advance().literal)
+
+    def prefix_literal_false(self) -> Expr:
+        self.advance()
+        return Literal(False)
+
+    def prefix_literal_true(self) -> Expr:
+        self.advance()
+        return Literal(True)
+
+    def prefix_literal_nil(self) -> Expr:
+        self.advance()
+        return Literal(None)
+
+    def prefix_variable(self) -> Expr:
+        return Variable(self.advance())
+
+    def prefix_this(self) -> Expr:
+        return This(self.advance())
+
+    def prefix_super(self) -> Expr:
+        keyword = self.advance()
+        self.consume(DOT, "Expect '.' after 'super'.")
+        method = self.consume(IDENTIFIER, "Expect superclass method name.")
+        return Super(keyword, method)
+
+    def prefix_grouping(self) -> Expr:
+        self.advance()
+        expr = self.expression()
+        self.consume(RIGHT_PAREN, "Expect ')' after expression.")
+        return Grouping(expr)
+
+    def prefix_unary(self) -> Expr:
+        operator = self.advance()
+        right = self.parse_precedence(PREC_UNARY)
+        return Unary(operator, right)
+
+    """
+    Infix parselets, each is called after the operator token has been consumed.
+    """
+
+    def infix_binary(self, left: Expr, operator: Token, precedence: int) -> Expr:
+        # binary operators are left associative, the right operand must bind tighter.
+        right = self.parse_precedence(precedence + 1)
+        return Binary(left, operator, right)
+
+    def infix_logical(self, left: Expr, operator: Token, precedence: int) -> Expr:
+        right = self.parse_precedence(precedence + 1)
+        return Logical(left, operator, right)
+
+    def infix_call(self, callee: Expr, paren: Token, precedence: int) -> Expr:
+        return self.finishCall(callee)
+
+    def infix_get(self, object: Expr, dot: Token, precedence: int) -> Expr:
+        name = self.consume(IDENTIFIER, "Expect property name after '.'.")
+        return Get(object, name)
+
+    prefix_parselets = {
+        TokenType.NUMBER: prefix_literal,
+        TokenType.STRING: prefix_literal,
+        TokenType.FALSE: prefix_literal_false,
+        TokenType.TRUE: prefix_literal_true,
+        TokenType.NIL: prefix_literal_nil,
+        TokenType.IDENTIFIER: prefix_variable,
+        TokenType.THIS: prefix_this,
+        TokenType.SUPER: prefix_super,
+        TokenType.LEFT_PAREN: prefix_grouping,
+        TokenType.BANG: prefix_unary,
+        TokenType.MINUS: prefix_unary,
+    }
+
+    infix_parselets = {
+        TokenType.OR: infix_logical,
+        TokenType.AND: infix_logical,
+        TokenType.BANG_EQUAL: infix_binary,
+        TokenType.EQUAL_EQUAL: infix_binary,
+        TokenType.GREATER: infix_binary,
+        TokenType.GREATER_EQUAL: infix_binary,
+        TokenType.LESS: infix_binary,
+        TokenType.LESS_EQUAL: infix_binary,
+        TokenType.MINUS: infix_binary,
+        TokenType.PLUS: infix_binary,
+        TokenType.SLASH: infix_binary,
+        TokenType.STAR: infix_binary,
+        TokenType.LEFT_PAREN: infix_call,
+        TokenType.DOT: infix_get,
+    }
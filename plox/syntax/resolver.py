@@ -25,12 +25,19 @@ class Resolver(Visitor):
     def __init__(self, interpreter: Interpreter):
         self.interpreter = interpreter
         self.scopes = []
+        # for each scope, the slot of every variable declared in it, i.e. its index in the Environment.
+        self.slots = []
+        # for each scope, whether a closure refers to one of its variables.
+        self.captured = []
+        # the indices in `scopes` of the scopes of the functions being resolved, innermost last.
+        self.function_scopes = []
         self.current_function = FunctionType.NONE
         self.current_class = ClassType.NONE
 
     def visitBlockStmt(self, stmt: STMT.Block) -> None:
         self.begin_scope()
         self.resolve(stmt.statements)
+        stmt.captured = self.captured[-1]
         self.end_scope()
     
     def visitExpressionStmt(self, stmt: STMT.Expression) -> None:
@@ -58,6 +65,7 @@ class Resolver(Visitor):
                 error(stmt.keyword, "Can't return a value from an initializer.")
             
             self.resolve(stmt.value)
+            stmt.tail_call = isinstance(stmt.value, EXPR.Call)
     
     def visitVarStmt(self, stmt: STMT.Var) -> None:
         self.declare(stmt.name)
@@ -88,7 +96,7 @@ class Resolver(Visitor):
     def visitLiteralExpr(self, expr: EXPR.Literal) -> None:
         pass
     
-    def vsisitLogicalExpr(self, expr: EXPR.Logical) -> None:
+    def visitLogicalExpr(self, expr: EXPR.Logical) -> None:
         self.resolve(expr.left)
         self.resolve(expr.right)
 
@@ -118,18 +126,13 @@ class Resolver(Visitor):
             self.current_class = ClassType.SUBCLASS
             self.resolve(stmt.superclass)
             self.begin_scope()
-            self.scopes[-1]["super"] = True
-
-        self.begin_scope()
-        self.scopes[-1]["this"] = True
+            self.declare_implicit("super")
 
         for method in stmt.methods:
             declaration = FunctionType.METHOD
             if method.name.lexeme == 'init':
                 declaration = FunctionType.INITIALIZER
             self.resolve_function(method, declaration)
-        
-        self.end_scope()
 
         if stmt.superclass is not None:
             self.end_scope()
@@ -141,8 +144,12 @@ class Resolver(Visitor):
         # resolve the variable to evaluate to its nearest definition in the static stage.
         for i in range(len(self.scopes)-1 , -1, -1):
             if name.lexeme in self.scopes[i]:
-                self.interpreter.resolve(expr, len(self.scopes)-1-i)
+                if self.function_scopes and self.function_scopes[-1] > i:
+                    self.captured[i] = True
+                self.interpreter.resolve(expr, len(self.scopes)-1-i, self.slots[i][name.lexeme])
                 return
+        # not found in any scope, the variable is assumed to be global.
+        self.interpreter.resolve_global(expr, name)
 
     def resolve(self, syntax: Union[STMT.Stmt, EXPR.Expr, List[STMT.Stmt]]):
         # for block statements list
@@ -158,18 +165,27 @@ class Resolver(Visitor):
         enclosing_function = self.current_function
         self.current_function = func_type
         self.begin_scope()
+        self.function_scopes.append(len(self.scopes) - 1)
+        if func_type is FunctionType.METHOD or func_type is FunctionType.INITIALIZER:
+            # the receiver is the first variable of the frame of a method, before the parameters.
+            self.declare_implicit("this")
         for param in function.params:
             self.declare(param)
             self.define(param)
         self.resolve(function.body)
         self.end_scope()
+        self.function_scopes.pop()
         self.current_function = enclosing_function
 
     def begin_scope(self):
         self.scopes.append(dict())
+        self.slots.append(dict())
+        self.captured.append(False)
 
     def end_scope(self):
         self.scopes.pop()
+        self.slots.pop()
+        self.captured.pop()
 
     def declare(self, name: Token) -> None:
         # for variable defined in global scope, we don't track it.
@@ -179,6 +195,17 @@ class Resolver(Visitor):
         if name.lexeme in scope:
             error(name, "Already a variable with this name in this scope.")
         scope[name.lexeme] = False
+        # variables are defined at runtime in the order they are declared, so the slot of a
+        # variable is the number of variables declared before it in the same scope.
+        slots = self.slots[-1]
+        slots.setdefault(name.lexeme, len(slots))
+
+    def declare_implicit(self, name: str) -> None:
+        """
+        Declare and define the variables introduced by the interpreter itself, i.e. "this" and "super".
+        """
+        self.scopes[-1][name] = True
+        self.slots[-1][name] = len(self.slots[-1])
     
     def define(self, name: Token) -> None:
         # for variable defined in global scope, we don't track it.
@@ -210,9 +237,11 @@ class Resolver(Visitor):
         enclosing_function = self.current_function
         self.current_function = FunctionType.FUNCTION
         self.begin_scope()
+        self.function_scopes.append(len(self.scopes) - 1)
         for param in function.params:
             self.declare(param)
             self.define(param)
         self.resolve(function.body)
         self.end_scope()
+        self.function_scopes.pop()
         self.current_function = enclosing_function
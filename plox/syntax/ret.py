@@ -1,4 +1,16 @@
+"""
+Signals returning from a Lox function. The closure-compiling engine raises `Return`, the
+tree-walking Interpreter passes the `RETURN` completion back through `execute` instead.
+"""
 class Return(RuntimeError):
     def __init__(self, value: object, message: str = None):
         super().__init__(message)
         self.value = value
+
+
+"""
+Completion of a statement executed by the Interpreter which ran a Lox `return`: `execute`
+returns it instead of None, and every enclosing statement returns it at once up to the
+`LoxFunction` being called, which finds the returned value in `Interpreter.return_value`.
+"""
+RETURN = object()
@@ -37,11 +37,24 @@ class Print(Stmt):
 class Block(Stmt):
     def __init__(self, statements: List[Stmt]):
         self.statements = statements
+        # set by the Resolver: whether a closure refers to a variable declared in the block.
+        self.captured = True
 
     def accept(self, visitor: Visitor):
         return visitor.visitBlockStmt(self)
 
 
+class CountedLoop(Block):
+    """
+    Block a `for` loop counting with a variable is desugared into, e.g.
+    `for (var i = a; i < b; i = i + c) body`: the declaration of the counter then the `While`,
+    whose body is the block of `body` and the increment. The Interpreter runs the condition and
+    the increment without visiting them, the other visitors see it as the generic `Block`.
+    """
+    def accept(self, visitor: Visitor):
+        return visitor.visitCountedLoopStmt(self)
+
+
 class Var(Stmt):
     def __init__(self, name: Token, initializer: Expr):
         """
@@ -86,6 +99,8 @@ class Return(Stmt):
     def __init__(self, keyword: Token, value: Expr):
         self.keyword = keyword
         self.value = value
+        # set by the Resolver when the value is a call whose result is returned as it is.
+        self.tail_call = False
 
     def accept(self, visitor: Visitor) -> None:
         return visitor.visitReturnStmt(self)
@@ -0,0 +1,54 @@
+from typing import List
+from plox.syntax import expr as EXPR
+from plox.syntax import stmt as STMT
+from plox.syntax.interpreter import Interpreter
+from plox.syntax.loxcallable import LoxCallable
+from plox.syntax.ret import RETURN
+
+
+class TailCall:
+    """
+    Call left to be made by the caller of the function returning it, in place of its result.
+    """
+    __slots__ = ("callee", "arguments")
+
+    def __init__(self, callee: LoxCallable, arguments: List[object]):
+        self.callee = callee
+        self.arguments = arguments
+
+
+class TrampolineInterpreter(Interpreter):
+    """
+    Tree-walking interpreter making proper tail calls.
+
+    A `return` the Resolver marked as a tail call evaluates the callee and the arguments but
+    does not call it: the function returns a `TailCall` instead, once its frames are gone. The
+    call expression that called the function then makes the tail call itself, in a loop. So a
+    chain of tail calls runs in constant Python stack and a function recursing in tail position,
+    e.g. an accumulator-style loop, runs at any depth.
+    """
+    def visitCallExpr(self, expr: EXPR.Call) -> object:
+        result = super().visitCallExpr(expr)
+        while type(result) is TailCall:
+            result = result.callee.call(self, result.arguments)
+        return result
+
+    def call(self, callee: LoxCallable, arguments: List[object]) -> object:
+        result = callee.call(self, arguments)
+        while type(result) is TailCall:
+            result = result.callee.call(self, result.arguments)
+        return result
+
+    def visitReturnStmt(self, stmt: STMT.Return):
+        if not stmt.tail_call:
+            return super().visitReturnStmt(stmt)
+
+        expr = stmt.value
+        callee = self.evaluate(expr.callee)
+        arguments = []
+        for argument in expr.arguments:
+            arguments.append(self.evaluate(argument))
+
+        self.check_call(expr, callee, arguments)
+        self.return_value = TailCall(callee, arguments)
+        return RETURN
@@ -3,4 +3,26 @@ from abc import ABC
 
 class Visitor(ABC):
     def __init__(self):
-        pass
\ No newline at end of file
+        pass
+
+    # The Interpreter rewrites the `Binary` and `Unary` nodes it executes into specialised
+    # variants and runs the `CountedLoop` blocks of the parser specially, the other visitors
+    # see them as the generic nodes.
+
+    def visitNumberBinaryExpr(self, expr):
+        return self.visitBinaryExpr(expr)
+
+    def visitStringBinaryExpr(self, expr):
+        return self.visitBinaryExpr(expr)
+
+    def visitEqualityBinaryExpr(self, expr):
+        return self.visitBinaryExpr(expr)
+
+    def visitNumberUnaryExpr(self, expr):
+        return self.visitUnaryExpr(expr)
+
+    def visitNotUnaryExpr(self, expr):
+        return self.visitUnaryExpr(expr)
+
+    def visitCountedLoopStmt(self, stmt):
+        return self.visitBlockStmt(stmt)
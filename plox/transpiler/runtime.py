@@ -0,0 +1,204 @@
+"""
+Runtime support of the Python code generated by the Transpiler.
+
+The generated code inlines the operations whose operands are already known to be numbers or
+booleans, and calls the helpers below for everything else. The helpers implement the same
+semantics and raise the same runtime errors as the tree-walking Interpreter. An error raised
+here carries no token, the TranspilingInterpreter finds the Lox line from the traceback.
+"""
+from typing import Dict, List
+from plox.error import PLoxRuntimeError
+from plox.syntax.loxcallable import LoxCallable
+from plox.syntax.loxclass import LoxClass
+from plox.syntax.loxinstance import LoxInstance
+from plox.syntax.output import format_number
+
+
+class Function(LoxCallable):
+    """
+    A Lox function compiled to the Python function `function`. The Python function of a
+    method takes the instance as its first argument, before the Lox parameters.
+    """
+    def __init__(self, function, name: str, parameter_count: int, is_initializer: bool = False):
+        self.function = function
+        self.name = name
+        self.parameter_count = parameter_count
+        self.is_initializer = is_initializer
+
+    def bind(self, instance: LoxInstance) -> "BoundFunction":
+        return BoundFunction(self, instance)
+
+    def call(self, interpreter, arguments: List[object]) -> object:
+        return self.function(*arguments)
+
+    def arity(self) -> int:
+        return self.parameter_count
+
+    def __str__(self) -> str:
+        return f"<fn {self.name}>"
+
+
+class BoundFunction(LoxCallable):
+    def __init__(self, method: Function, receiver: LoxInstance):
+        self.method = method
+        self.receiver = receiver
+
+    def call(self, interpreter, arguments: List[object]) -> object:
+        return self.method.function(self.receiver, *arguments)
+
+    def arity(self) -> int:
+        return self.method.parameter_count
+
+    def __str__(self) -> str:
+        return str(self.method)
+
+
+def error(message: str) -> PLoxRuntimeError:
+    return PLoxRuntimeError(None, message)
+
+
+def stringify(object: object) -> str:
+    if object is None: return "nil"
+    if isinstance(object, float):
+        return format_number(object)
+    return str(object)
+
+
+def truthy(object: object) -> bool:
+    return object is not None and object is not False
+
+
+def add(left: object, right: object) -> object:
+    if type(left) is float and type(right) is float:
+        return left + right
+    if isinstance(left, str) or isinstance(right, str):
+        return stringify(left) + stringify(right)
+    return None
+
+
+def check_numbers(left: object, right: object) -> None:
+    if type(left) is not float or type(right) is not float:
+        raise error("operand must be a number")
+
+
+def subtract(left: object, right: object) -> float:
+    check_numbers(left, right)
+    return left - right
+
+
+def multiply(left: object, right: object) -> float:
+    check_numbers(left, right)
+    return left * right
+
+
+def divide(left: object, right: object) -> float:
+    check_numbers(left, right)
+    return left / right
+
+
+def greater(left: object, right: object) -> bool:
+    check_numbers(left, right)
+    return left > right
+
+
+def greater_equal(left: object, right: object) -> bool:
+    check_numbers(left, right)
+    return left >= right
+
+
+def less(left: object, right: object) -> bool:
+    check_numbers(left, right)
+    return left < right
+
+
+def less_equal(left: object, right: object) -> bool:
+    check_numbers(left, right)
+    return left <= right
+
+
+def negate(operand: object) -> float:
+    if type(operand) is not float:
+        raise error("operand must be a number")
+    return -operand
+
+
+def call(callee: object, *arguments: object) -> object:
+    if type(callee) is Function:
+        if len(arguments) != callee.parameter_count:
+            raise error(f"Expected {callee.parameter_count} arguments but got {len(arguments)}.")
+        return callee.function(*arguments)
+
+    if not isinstance(callee, LoxCallable):
+        raise error("Can only call functions and classes.")
+    if len(arguments) != callee.arity():
+        raise error(f"Expected {callee.arity()} arguments but got {len(arguments)}.")
+    return callee.call(None, list(arguments))
+
+
+def get_property(object: object, name: str) -> object:
+    if not isinstance(object, LoxInstance):
+        raise error("Only instances have properties.")
+    index = object.shape.indices.get(name)
+    if index is not None:
+        return object.values[index]
+    method = object.klass.find_function(name)
+    if method is None:
+        raise error(f"Undefined property '{name}'.")
+    return method.bind(object)
+
+
+def set_property(object: object, name: str, value: object) -> object:
+    if not isinstance(object, LoxInstance):
+        raise error("Only instances have fields.")
+    object.set_field(name, value)
+    return value
+
+
+def get_super(superclass: LoxClass, instance: LoxInstance, name: str) -> object:
+    method = superclass.find_function(name)
+    if method is None:
+        raise error(f"Undefined property '{name}'.")
+    return method.bind(instance)
+
+
+def check_superclass(superclass: object) -> LoxClass:
+    if not isinstance(superclass, LoxClass):
+        raise error("Superclass must be a class.")
+    return superclass
+
+
+def set_cell(cell: List[object], value: object) -> object:
+    cell[0] = value
+    return value
+
+
+def assign_global(namespace: Dict[str, object], name: str, value: object) -> object:
+    """
+    Check that the global `name`, mangled, is defined before it is assigned `value`.
+    """
+    if name not in namespace:
+        raise error(f"Undefined variable {name[:-1]}.")
+    return value
+
+
+"""
+Names the generated code uses, they all end with a letter and can't clash with the mangled
+Lox variables which end with "_" or a digit.
+"""
+EXPORTS = (
+    Function, LoxClass, stringify, truthy, add, subtract, multiply, divide, greater, greater_equal,
+    less, less_equal, negate, call, get_property, set_property, get_super, check_superclass,
+    set_cell, assign_global,
+)
+
+
+def namespace() -> Dict[str, object]:
+    """
+    Return a new namespace to execute generated code in, holding the runtime helpers.
+    The Lox globals are added to it as the code runs.
+    """
+    namespace = {value.__name__: value for value in EXPORTS}
+    # writes the lines printed, the TranspilingInterpreter sets it to its output buffer.
+    namespace["write_line"] = print
+    namespace["lox_globals"] = namespace
+    return namespace
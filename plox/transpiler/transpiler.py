@@ -0,0 +1,680 @@
+import itertools
+import warnings
+from typing import Dict, Iterator, List, Optional, Tuple
+from plox.syntax import Visitor
+from plox.syntax import expr as EXPR
+from plox.syntax import stmt as STMT
+from plox.lexer.token import *
+from plox.error import PLoxRuntimeError
+from plox.syntax.interpreter import Interpreter
+from plox.transpiler import runtime
+
+
+class Binding:
+    """
+    A local variable of the Lox program and the Python variable holding it. A local captured by
+    a nested function is boxed in a one-element list, the cell, which the nested functions receive
+    as a keyword-only default argument when they are created. So every closure sees the variables
+    as they are when it is created, e.g. a new cell on every iteration of a loop, like in Lox.
+    """
+    __slots__ = ("name", "function", "captured")
+
+    def __init__(self, name: str, function):
+        self.name = name
+        # declaration of the function the variable is local to, None for the top level.
+        self.function = function
+        self.captured = False
+
+
+class CaptureAnalysis(Visitor):
+    """
+    Bind every local of the program to a unique Python name and find those captured by closures.
+
+    The bindings are recorded by the id of the declaring node (`Var`, `Function`, `Class`, the
+    parameter token) or of the referencing node (`Variable`, `Assign`, `This`), and by
+    ("this", id(method)), ("super", id(class)) for the implicit variables.
+    """
+    def __init__(self, counter: Iterator[int]):
+        self.counter = counter
+        self.scopes: List[Dict[str, Binding]] = []
+        self.function = None
+        self.bindings: Dict[object, Binding] = {}
+
+    def analyze(self, statements: List[STMT.Stmt]) -> Dict[object, Binding]:
+        self.statements(statements)
+        return self.bindings
+
+    def statements(self, statements: List[STMT.Stmt]) -> None:
+        for statement in statements:
+            if statement is not None:
+                statement.accept(self)
+
+    def declare(self, key: object, name: str, python_name: str = None) -> None:
+        # variables declared outside of any scope are globals, they are not bound.
+        if not self.scopes:
+            return
+        binding = Binding(python_name or f"{name}_{next(self.counter)}", self.function)
+        self.scopes[-1][name] = binding
+        self.bindings[key] = binding
+
+    def reference(self, key: object, name: str) -> None:
+        for scope in reversed(self.scopes):
+            binding = scope.get(name)
+            if binding is not None:
+                if binding.function is not self.function:
+                    binding.captured = True
+                self.bindings[key] = binding
+                return
+
+    def function_body(self, function, params: List[Token], this: bool = False) -> None:
+        enclosing = self.function
+        self.function = function
+        self.scopes.append(dict())
+        if this:
+            self.declare(("this", id(function)), "this", "this")
+        for param in params:
+            self.declare(id(param), param.lexeme)
+        self.statements(function.body)
+        self.scopes.pop()
+        self.function = enclosing
+
+    def visitBlockStmt(self, stmt: STMT.Block) -> None:
+        self.scopes.append(dict())
+        self.statements(stmt.statements)
+        self.scopes.pop()
+
+    def visitClassStmt(self, stmt: STMT.Class) -> None:
+        self.declare(id(stmt), stmt.name.lexeme)
+        if stmt.superclass is not None:
+            stmt.superclass.accept(self)
+            self.scopes.append(dict())
+            self.declare(("super", id(stmt)), "super", f"super_{next(self.counter)}")
+        for method in stmt.methods:
+            self.function_body(method, method.params, this=True)
+        if stmt.superclass is not None:
+            self.scopes.pop()
+
+    def visitExpressionStmt(self, stmt: STMT.Expression) -> None:
+        stmt.expression.accept(self)
+
+    def visitFunctionStmt(self, stmt: STMT.Function) -> None:
+        self.declare(id(stmt), stmt.name.lexeme)
+        self.function_body(stmt, stmt.params)
+
+    def visitIfStmt(self, stmt: STMT.If) -> None:
+        stmt.condition.accept(self)
+        stmt.then_branch.accept(self)
+        if stmt.else_branch is not None:
+            stmt.else_branch.accept(self)
+
+    def visitPrintStmt(self, stmt: STMT.Print) -> None:
+        stmt.expression.accept(self)
+
+    def visitReturnStmt(self, stmt: STMT.Return) -> None:
+        if stmt.value is not None:
+            stmt.value.accept(self)
+        elif self.function is not None and self.scopes:
+            # `return;` in an initializer returns "this".
+            self.reference(id(stmt), "this")
+
+    def visitVarStmt(self, stmt: STMT.Var) -> None:
+        if stmt.initializer is not None:
+            stmt.initializer.accept(self)
+        self.declare(id(stmt), stmt.name.lexeme)
+
+    def visitWhileStmt(self, stmt: STMT.While) -> None:
+        stmt.condition.accept(self)
+        stmt.body.accept(self)
+
+    def visitAssignExpr(self, expr: EXPR.Assign) -> None:
+        expr.value.accept(self)
+        if expr.depth is not None:
+            self.reference(id(expr), expr.name.lexeme)
+
+    def visitBinaryExpr(self, expr: EXPR.Binary) -> None:
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visitCallExpr(self, expr: EXPR.Call) -> None:
+        expr.callee.accept(self)
+        for argument in expr.arguments:
+            argument.accept(self)
+
+    def visitGetExpr(self, expr: EXPR.Get) -> None:
+        expr.object.accept(self)
+
+    def visitGroupingExpr(self, expr: EXPR.Grouping) -> None:
+        expr.expression.accept(self)
+
+    def visitLambdaExpr(self, expr: EXPR.Lambda) -> None:
+        self.function_body(expr, expr.params)
+
+    def visitLiteralExpr(self, expr: EXPR.Literal) -> None:
+        pass
+
+    def visitLogicalExpr(self, expr: EXPR.Logical) -> None:
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visitSetExpr(self, expr: EXPR.Set) -> None:
+        expr.object.accept(self)
+        expr.value.accept(self)
+
+    def visitSuperExpr(self, expr: EXPR.Super) -> None:
+        self.reference(("super", id(expr)), "super")
+        self.reference(("this", id(expr)), "this")
+
+    def visitThisExpr(self, expr: EXPR.This) -> None:
+        self.reference(id(expr), "this")
+
+    def visitUnaryExpr(self, expr: EXPR.Unary) -> None:
+        expr.right.accept(self)
+
+    def visitVariableExpr(self, expr: EXPR.Variable) -> None:
+        if expr.depth is not None:
+            self.reference(id(expr), expr.name.lexeme)
+
+
+class FunctionContext:
+    """
+    The Python function being generated: the script wrapping the top-level code, or a Lox function.
+    """
+    def __init__(self, enclosing: Optional["FunctionContext"], function, is_initializer: bool = False):
+        self.enclosing = enclosing
+        self.function = function
+        self.is_initializer = is_initializer
+        # (indentation, text, Lox line) of every line of the body.
+        self.lines: List[Tuple[int, str, int]] = []
+        self.indent = 0
+        # Lox globals assigned in the function, they must be declared `global`.
+        self.globals = set()
+        # cells of the enclosing functions used in the function, or in the functions it defines.
+        self.free: Dict[str, Binding] = {}
+
+
+"""
+A generated expression: its Python code, its Python type when it is known, e.g. float for
+arithmetic or str for a string literal, and whether the code can be evaluated twice, i.e. it has no side effect and is cheap.
+"""
+Code = Tuple[str, Optional[type], bool]
+
+
+class Transpiler(Visitor):
+    """
+    Translate a resolved Lox program to the source of a Python module.
+
+    Lox globals are globals of the module, named after the Lox name with a trailing "_", and
+    the locals of a Lox function are locals of the Python function, made unique with a number.
+    The top-level code is wrapped in a `script` function so that the locals of top-level blocks
+    are fast Python locals. Arithmetic and comparisons on operands that can be evaluated twice are
+    inlined behind a `type(x) is float` guard, everything else calls the helpers of the runtime.
+    """
+    def __init__(self, defined_globals: List[str] = ()):
+        self.counter = itertools.count(1)
+        self.bindings: Dict[object, Binding] = {}
+        self.context: FunctionContext = None
+        self.line = 0
+        # globals defined by the top-level code so far, top-level code that follows can assign them unchecked.
+        self.defined_globals = set(defined_globals)
+
+    def transpile(self, statements: List[STMT.Stmt]) -> Tuple[str, List[int]]:
+        """
+        Return the source of the Python module running `statements` and the Lox line of every
+        line of the source.
+        """
+        self.bindings = CaptureAnalysis(self.counter).analyze(statements)
+        self.context = FunctionContext(None, None)
+        self.statements(statements)
+        script = self.context
+        self.context = None
+
+        lines = ["def script():"]
+        line_map = [script.lines[0][2] if script.lines else 0]
+        if script.globals:
+            lines.append("    global " + ", ".join(sorted(script.globals)))
+            line_map.append(line_map[0])
+        for indent, text, line in script.lines or [(0, "pass", 0)]:
+            lines.append("    " * (indent + 1) + text)
+            line_map.append(line)
+        lines.append("script()")
+        line_map.append(line_map[-1])
+        return "\n".join(lines) + "\n", line_map
+
+    """
+    Emitting code
+    """
+
+    def emit(self, text: str) -> None:
+        context = self.context
+        context.lines.append((context.indent, text, self.line))
+
+    def suite(self, statement: STMT.Stmt) -> None:
+        """
+        Emit an indented block of statements, `pass` when it is empty.
+        """
+        context = self.context
+        context.indent += 1
+        count = len(context.lines)
+        statement.accept(self)
+        if len(context.lines) == count:
+            self.emit("pass")
+        context.indent -= 1
+
+    def statements(self, statements: List[STMT.Stmt]) -> None:
+        for statement in statements:
+            if statement is not None:
+                statement.accept(self)
+
+    def expression(self, expr: EXPR.Expr) -> Code:
+        return expr.accept(self)
+
+    def condition(self, expr: EXPR.Expr) -> str:
+        """
+        Python expression testing whether `expr` is truthy in Lox, where only nil and false are falsey.
+        """
+        truthy = self.literal_truthiness(expr)
+        if truthy is not None:
+            return repr(truthy)
+        code, kind, simple = self.expression(expr)
+        if kind is bool:
+            return code
+        if simple:
+            return f"{code} is not None and {code} is not False"
+        return f"truthy({code})"
+
+    def literal_truthiness(self, expr: EXPR.Expr) -> Optional[bool]:
+        """
+        Whether `expr` is truthy in Lox when it is a literal, None otherwise. The tests of
+        literals are folded: CPython warns about `is` with a literal operand.
+        """
+        while isinstance(expr, EXPR.Grouping):
+            expr = expr.expression
+        if not isinstance(expr, EXPR.Literal):
+            return None
+        return expr.value is not None and expr.value is not False
+
+    def temporary(self) -> str:
+        return f"tmp_{next(self.counter)}"
+
+    def function(self, declaration, name: str, method: bool = False, is_initializer: bool = False) -> str:
+        """
+        Emit the Python function of a Lox function, return its name.
+        """
+        def_name = f"{name}_{next(self.counter)}_def"
+        context = self.context = FunctionContext(self.context, declaration, is_initializer)
+
+        params = []
+        if method:
+            params.append("this")
+            if self.bindings[("this", id(declaration))].captured:
+                self.emit("this = [this]")
+        for param in declaration.params:
+            binding = self.bindings[id(param)]
+            params.append(binding.name)
+            if binding.captured:
+                self.emit(f"{binding.name} = [{binding.name}]")
+        self.statements(declaration.body)
+
+        enclosing = self.context = context.enclosing
+        if context.free:
+            params.append("*")
+            params.extend(f"{cell}={cell}" for cell in context.free)
+        self.emit(f"def {def_name}({', '.join(params)}):")
+        if context.globals:
+            enclosing.lines.append((enclosing.indent + 1, "global " + ", ".join(sorted(context.globals)), self.line))
+        for indent, text, line in context.lines or [(0, "pass", self.line)]:
+            enclosing.lines.append((enclosing.indent + 1 + indent, text, line))
+
+        # the cells the function receives from further out must be passed through the enclosing function.
+        for cell, binding in context.free.items():
+            if binding.function is not enclosing.function:
+                enclosing.free[cell] = binding
+        return def_name
+
+    def store(self, key: object, name: str, value: str) -> None:
+        """
+        Emit the definition of the variable declared by the node `key`, named `name` in Lox.
+        """
+        binding = self.bindings.get(key)
+        if binding is None:
+            global_name = name + "_"
+            self.context.globals.add(global_name)
+            self.defined_globals.add(global_name)
+            self.emit(f"{global_name} = {value}")
+        elif binding.captured:
+            self.emit(f"{binding.name} = [{value}]")
+        else:
+            self.emit(f"{binding.name} = {value}")
+
+    def load(self, key: object, name: str) -> Code:
+        """
+        Code reading the variable referenced by the node `key`, named `name` in Lox.
+        """
+        binding = self.bindings.get(key)
+        if binding is None:
+            return name + "_", None, True
+        if binding.function is not self.context.function:
+            self.context.free[binding.name] = binding
+        if binding.captured:
+            return f"{binding.name}[0]", None, True
+        return binding.name, None, True
+
+    """
+    Statements
+    """
+
+    def visitBlockStmt(self, stmt: STMT.Block) -> None:
+        self.statements(stmt.statements)
+
+    def visitClassStmt(self, stmt: STMT.Class) -> None:
+        self.line = stmt.name.line
+        name = stmt.name.lexeme
+        binding = self.bindings.get(id(stmt))
+        if binding is not None and binding.captured:
+            # the methods receive the cell of the class before it is created.
+            self.emit(f"{binding.name} = [None]")
+
+        superclass = "None"
+        if stmt.superclass is not None:
+            code, _, _ = self.expression(stmt.superclass)
+            super_binding = self.bindings[("super", id(stmt))]
+            self.line = stmt.superclass.name.line
+            if super_binding.captured:
+                self.emit(f"{super_binding.name} = [check_superclass({code})]")
+                superclass = f"{super_binding.name}[0]"
+            else:
+                self.emit(f"{super_binding.name} = check_superclass({code})")
+                superclass = super_binding.name
+
+        methods = []
+        for method in stmt.methods:
+            self.line = method.name.line
+            is_initializer = method.name.lexeme == "init"
+            def_name = self.function(method, f"{name}_{method.name.lexeme}", method=True, is_initializer=is_initializer)
+            methods.append(f"{method.name.lexeme!r}: Function({def_name}, {method.name.lexeme!r}, "
+                           f"{len(method.params)}, {is_initializer})")
+
+        self.line = stmt.name.line
+        klass = f"LoxClass({name!r}, {superclass}, {{{', '.join(methods)}}})"
+        if binding is not None and binding.captured:
+            self.emit(f"{binding.name}[0] = {klass}")
+        else:
+            self.store(id(stmt), name, klass)
+
+    def visitExpressionStmt(self, stmt: STMT.Expression) -> None:
+        if isinstance(stmt.expression, EXPR.Assign):
+            self.assign(stmt.expression, statement=True)
+            return
+        code, _, _ = self.expression(stmt.expression)
+        self.emit(code)
+
+    def visitFunctionStmt(self, stmt: STMT.Function) -> None:
+        self.line = stmt.name.line
+        name = stmt.name.lexeme
+        binding = self.bindings.get(id(stmt))
+        if binding is not None and binding.captured:
+            # the function receives its own cell, to call itself.
+            self.emit(f"{binding.name} = [None]")
+        def_name = self.function(stmt, name)
+        function = f"Function({def_name}, {name!r}, {len(stmt.params)})"
+        if binding is not None and binding.captured:
+            self.emit(f"{binding.name}[0] = {function}")
+        else:
+            self.store(id(stmt), name, function)
+
+    def visitIfStmt(self, stmt: STMT.If) -> None:
+        condition = self.condition(stmt.condition)
+        self.emit(f"if {condition}:")
+        self.suite(stmt.then_branch)
+        if stmt.else_branch is not None:
+            self.emit("else:")
+            self.suite(stmt.else_branch)
+
+    def visitPrintStmt(self, stmt: STMT.Print) -> None:
+        code, _, _ = self.expression(stmt.expression)
+        self.emit(f"write_line(stringify({code}))")
+
+    def visitReturnStmt(self, stmt: STMT.Return) -> None:
+        self.line = stmt.keyword.line
+        if stmt.value is not None:
+            code, _, _ = self.expression(stmt.value)
+            self.emit(f"return {code}")
+        elif self.context.is_initializer:
+            code, _, _ = self.load(id(stmt), "this")
+            self.emit(f"return {code}")
+        else:
+            self.emit("return None")
+
+    def visitVarStmt(self, stmt: STMT.Var) -> None:
+        self.line = stmt.name.line
+        value = "None"
+        if stmt.initializer is not None:
+            value, _, _ = self.expression(stmt.initializer)
+        self.store(id(stmt), stmt.name.lexeme, value)
+
+    def visitWhileStmt(self, stmt: STMT.While) -> None:
+        condition = self.condition(stmt.condition)
+        self.emit(f"while {condition}:")
+        self.suite(stmt.body)
+
+    """
+    Expressions
+    """
+
+    def assign(self, expr: EXPR.Assign, statement: bool = False) -> Code:
+        self.line = expr.name.line
+        value, kind, _ = self.expression(expr.value)
+        binding = self.bindings.get(id(expr))
+
+        if binding is None:
+            name = expr.name.lexeme + "_"
+            self.context.globals.add(name)
+            if self.context.function is None and name in self.defined_globals:
+                target, code = name, value
+            else:
+                target, code = name, f"assign_global(lox_globals, {name!r}, {value})"
+        elif binding.captured:
+            self.load(id(expr), expr.name.lexeme)
+            if statement:
+                self.emit(f"{binding.name}[0] = {value}")
+                return None
+            return f"set_cell({binding.name}, {value})", kind, False
+        else:
+            target, code = binding.name, value
+
+        if statement:
+            self.emit(f"{target} = {code}")
+            return None
+        return f"({target} := {code})", kind, False
+
+    def visitAssignExpr(self, expr: EXPR.Assign) -> Code:
+        return self.assign(expr)
+
+    def visitBinaryExpr(self, expr: EXPR.Binary) -> Code:
+        left, left_kind, left_simple = self.expression(expr.left)
+        right, right_kind, right_simple = self.expression(expr.right)
+        self.line = expr.operator.line
+        kind = expr.operator.kind
+
+        if kind == TokenType.EQUAL_EQUAL:
+            return f"({left} == {right})", bool, False
+        if kind == TokenType.BANG_EQUAL:
+            return f"({left} != {right})", bool, False
+
+        operator, helper, result = BINARY_OPERATORS[kind]
+        if kind == TokenType.PLUS and (left_kind is not float or right_kind is not float):
+            # the sum is only known to be a number when both operands are.
+            result = None
+        if not (left_simple and right_simple) or left_kind not in (None, float) or right_kind not in (None, float):
+            return f"{helper}({left}, {right})", result, False
+
+        guards = [f"type({code}) is float" for code, code_kind in ((left, left_kind), (right, right_kind))
+                  if code_kind is not float]
+        if not guards:
+            return f"({left} {operator} {right})", result, False
+        return f"({left} {operator} {right} if {' and '.join(guards)} else {helper}({left}, {right}))", result, False
+
+    def visitCallExpr(self, expr: EXPR.Call) -> Code:
+        callee, _, _ = self.expression(expr.callee)
+        arguments = [self.expression(argument)[0] for argument in expr.arguments]
+        self.line = expr.paren.line
+        return f"call({', '.join([callee] + arguments)})", None, False
+
+    def visitGetExpr(self, expr: EXPR.Get) -> Code:
+        object, _, _ = self.expression(expr.object)
+        self.line = expr.name.line
+        return f"get_property({object}, {expr.name.lexeme!r})", None, False
+
+    def visitGroupingExpr(self, expr: EXPR.Grouping) -> Code:
+        return self.expression(expr.expression)
+
+    def visitLambdaExpr(self, expr: EXPR.Lambda) -> Code:
+        def_name = self.function(expr, "lambda")
+        return f"Function({def_name}, {expr.name!r}, {len(expr.params)})", None, False
+
+    def visitLiteralExpr(self, expr: EXPR.Literal) -> Code:
+        value = expr.value
+        return repr(value), type(value), True
+
+    def visitLogicalExpr(self, expr: EXPR.Logical) -> Code:
+        left, left_kind, left_simple = self.expression(expr.left)
+        right, right_kind, _ = self.expression(expr.right)
+        self.line = expr.operator.line
+        kind = bool if left_kind is bool and right_kind is bool else None
+        is_or = expr.operator.kind == TokenType.OR
+
+        if left_kind is bool:
+            return f"({left} {'or' if is_or else 'and'} {right})", kind, False
+        truthy = self.literal_truthiness(expr.left)
+        if truthy is not None:
+            test, value = repr(truthy), left
+        elif left_simple:
+            test, value = f"{left} is not None and {left} is not False", left
+        else:
+            value = self.temporary()
+            test = f"truthy({value} := {left})"
+        if is_or:
+            return f"({value} if {test} else {right})", kind, False
+        return f"({right} if {test} else {value})", kind, False
+
+    def visitSetExpr(self, expr: EXPR.Set) -> Code:
+        object, _, _ = self.expression(expr.object)
+        value, kind, _ = self.expression(expr.value)
+        self.line = expr.name.line
+        return f"set_property({object}, {expr.name.lexeme!r}, {value})", kind, False
+
+    def visitSuperExpr(self, expr: EXPR.Super) -> Code:
+        superclass, _, _ = self.load(("super", id(expr)), "super")
+        this, _, _ = self.load(("this", id(expr)), "this")
+        self.line = expr.method.line
+        return f"get_super({superclass}, {this}, {expr.method.lexeme!r})", None, False
+
+    def visitThisExpr(self, expr: EXPR.This) -> Code:
+        return self.load(id(expr), "this")
+
+    def visitUnaryExpr(self, expr: EXPR.Unary) -> Code:
+        right, kind, simple = self.expression(expr.right)
+        self.line = expr.operator.line
+
+        if expr.operator.kind == TokenType.MINUS:
+            if kind is float:
+                return f"(-{right})", float, False
+            if simple and kind is None:
+                return f"(-{right} if type({right}) is float else negate({right}))", float, False
+            return f"negate({right})", float, False
+
+        if kind is bool:
+            return f"(not {right})", bool, False
+        truthy = self.literal_truthiness(expr.right)
+        if truthy is not None:
+            return repr(not truthy), bool, True
+        if simple:
+            return f"({right} is None or {right} is False)", bool, False
+        return f"(not truthy({right}))", bool, False
+
+    def visitVariableExpr(self, expr: EXPR.Variable) -> Code:
+        self.line = expr.name.line
+        return self.load(id(expr), expr.name.lexeme)
+
+
+"""
+Python operator, runtime helper and result type of the binary operators taking numbers.
+"""
+BINARY_OPERATORS = {
+    TokenType.PLUS: ("+", "add", float),
+    TokenType.MINUS: ("-", "subtract", float),
+    TokenType.STAR: ("*", "multiply", float),
+    TokenType.SLASH: ("/", "divide", float),
+    TokenType.GREATER: (">", "greater", bool),
+    TokenType.GREATER_EQUAL: (">=", "greater_equal", bool),
+    TokenType.LESS: ("<", "less", bool),
+    TokenType.LESS_EQUAL: ("<=", "less_equal", bool),
+}
+
+
+class TranspilingInterpreter(Interpreter):
+    """
+    Execution engine translating the program to Python with the `Transpiler`, then compiling the
+    Python source with `compile()` and running it, so that CPython's own compiler and bytecode
+    interpreter do the work.
+
+    The generated code raises runtime errors without a token. The engine finds the line of the
+    generated source being executed in the traceback and maps it back to the Lox line.
+    """
+    def __init__(self):
+        super().__init__()
+        self.namespace = runtime.namespace()
+        # the natives defined by the Interpreter, e.g. clock.
+        for name, index in self.globals.names.items():
+            self.namespace[name + "_"] = self.globals.values[index]
+        self.transpiler = Transpiler([name + "_" for name in self.globals.names])
+        # the Lox line of every line of every generated module, by module file name.
+        self.line_maps: Dict[str, List[int]] = {}
+
+    def transpile(self, statements: List[STMT.Stmt]) -> str:
+        source, _ = self.transpiler.transpile(statements)
+        return source
+
+    def interpret(self, statements) -> None:
+        try:
+            self.run_python(statements)
+        except PLoxRuntimeError as e:
+            self.runtime_error(e)
+        finally:
+            self.output.flush()
+
+    def execute(self, stmt: STMT.Stmt):
+        self.run_python([stmt])
+
+    def run_python(self, statements: List[STMT.Stmt]) -> None:
+        source, line_map = self.transpiler.transpile(statements)
+        filename = f"<lox-{len(self.line_maps)}>"
+        self.line_maps[filename] = line_map
+        with warnings.catch_warnings():
+            # the generated code must compile silently, a warning shown to the user is a bug.
+            warnings.simplefilter("error", SyntaxWarning)
+            code = compile(source, filename, "exec")
+        self.namespace["write_line"] = self.output.write
+        try:
+            exec(code, self.namespace)
+        except PLoxRuntimeError as e:
+            raise self.locate(e, e.__traceback__)
+        except NameError as e:
+            # a Lox global read before it is defined.
+            if e.name is None or not e.name.endswith("_"):
+                raise
+            raise self.locate(PLoxRuntimeError(None, f"Variable {e.name[:-1]} does not exist."), e.__traceback__) from None
+
+    def locate(self, error: PLoxRuntimeError, traceback) -> PLoxRuntimeError:
+        """
+        Give `error` a token at the Lox line of the innermost generated code in the traceback.
+        """
+        line = None
+        while traceback is not None:
+            line_map = self.line_maps.get(traceback.tb_frame.f_code.co_filename)
+            if line_map is not None:
+                line = line_map[traceback.tb_lineno - 1]
+            traceback = traceback.tb_next
+        if error.token is None and line is not None:
+            error.token = Token("", None, line)
+        return error
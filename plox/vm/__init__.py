@@ -0,0 +1,4 @@
+from .chunk import OpCode, Chunk, Function
+from .compiler import Compiler
+from .debug import disassemble
+from .vm import VM
@@ -0,0 +1,101 @@
+from typing import List
+from plox.lexer.token import Token
+
+
+class OpCode:
+    """
+    Instructions of the bytecode run by the VM. An instruction is its opcode followed by
+    its operands, all stored as ints in the code of a `Chunk`. Like `TokenType`, opcodes
+    are plain ints so that the dispatch loop compares them as cheaply as possible.
+    """
+    CONSTANT = 0            # index: push constants[index]
+    NIL = 1
+    TRUE = 2
+    FALSE = 3
+    POP = 4
+    GET_LOCAL = 5           # slot: push the local at slot of the current frame
+    SET_LOCAL = 6           # slot
+    GET_GLOBAL = 7          # index: push the global at index of the GlobalEnvironment
+    DEFINE_GLOBAL = 8       # index
+    SET_GLOBAL = 9          # index
+    GET_UPVALUE = 10        # index: push the upvalue at index of the current closure
+    SET_UPVALUE = 11        # index
+    GET_PROPERTY = 12       # name constant
+    SET_PROPERTY = 13       # name constant
+    GET_SUPER = 14          # name constant
+    EQUAL = 15
+    NOT_EQUAL = 16
+    GREATER = 17
+    GREATER_EQUAL = 18
+    LESS = 19
+    LESS_EQUAL = 20
+    ADD = 21
+    SUBTRACT = 22
+    MULTIPLY = 23
+    DIVIDE = 24
+    NOT = 25
+    NEGATE = 26
+    PRINT = 27
+    JUMP = 28               # offset: jump forward, relative to the next instruction
+    JUMP_IF_FALSE = 29      # offset: jump forward when the top of the stack is falsey, without popping it
+    LOOP = 30               # offset: jump backward, relative to the next instruction
+    CALL = 31               # argument count
+    CLOSURE = 32            # function constant, then (is_local, index) for each upvalue
+    CLOSE_UPVALUE = 33
+    RETURN = 34
+    CLASS = 35              # name constant
+    INHERIT = 36
+    METHOD = 37             # name constant
+
+
+OPCODE_NAMES = {value: name for name, value in vars(OpCode).items() if name.isupper()}
+
+
+class Chunk:
+    """
+    Bytecode of a function: the instructions, the constant pool they refer to by index, and
+    for every cell of the code the token of the source it was compiled from, used to report
+    runtime errors and by the disassembler.
+    """
+    def __init__(self):
+        self.code: List[int] = []
+        self.constants: List[object] = []
+        self.tokens: List[Token] = []
+        # index of every number, string and name already in the constant pool.
+        self.constant_indices = {}
+
+    def write(self, byte: int, token: Token) -> int:
+        """
+        Append a cell to the code and return its offset.
+        """
+        self.code.append(byte)
+        self.tokens.append(token)
+        return len(self.code) - 1
+
+    def add_constant(self, value: object) -> int:
+        # functions are never shared, numbers and strings are stored once. The type is part
+        # of the key because 1.0 and True compare, and hash, equal.
+        if isinstance(value, (float, str)):
+            key = (type(value), value)
+            index = self.constant_indices.get(key)
+            if index is None:
+                index = self.constant_indices[key] = len(self.constants)
+                self.constants.append(value)
+            return index
+        self.constants.append(value)
+        return len(self.constants) - 1
+
+
+class Function:
+    """
+    A compiled function: its bytecode and what the VM needs to call it and build its closures.
+    """
+    def __init__(self, name: str, arity: int = 0, is_initializer: bool = False):
+        self.name = name
+        self.arity = arity
+        self.is_initializer = is_initializer
+        self.upvalue_count = 0
+        self.chunk = Chunk()
+
+    def __str__(self) -> str:
+        return f"<fn {self.name}>"
@@ -0,0 +1,396 @@
+from typing import List, Optional
+from plox.syntax import Visitor
+from plox.syntax import expr as EXPR
+from plox.syntax import stmt as STMT
+from plox.lexer.token import *
+from plox.vm.chunk import OpCode, Function
+
+
+class Local:
+    __slots__ = ("name", "depth", "is_captured")
+
+    def __init__(self, name: str, depth: int):
+        self.name = name
+        self.depth = depth
+        # set when a closure captures the variable, it must then be moved off the stack
+        # when it goes out of scope.
+        self.is_captured = False
+
+
+class FunctionState:
+    """
+    Compilation state of the function being compiled, nested functions push a new state.
+    """
+    def __init__(self, enclosing: Optional["FunctionState"], function: Function, receiver: str):
+        self.enclosing = enclosing
+        self.function = function
+        # slot 0 of a frame holds the callee, or the receiver of a method which is named "this".
+        self.locals = [Local(receiver, 0)]
+        # (is_local, index) of every upvalue captured by the function.
+        self.upvalues = []
+        self.scope_depth = 0
+
+
+class Compiler(Visitor):
+    """
+    Compile a resolved syntax tree to the bytecode run by the VM.
+
+    Globals are addressed by the index the Resolver gave them in the GlobalEnvironment.
+    Locals live on the VM stack: the compiler gives every local the stack slot it occupies
+    in the frame of its function, blocks don't create frames. A local of an enclosing function
+    is accessed through an upvalue, which the VM closes over when the local goes out of scope.
+    """
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.state: FunctionState = None
+        # token of the last node visited, gives the line of the instructions without a token of their own.
+        self.token: Token = None
+
+    def compile(self, statements: List[STMT.Stmt]) -> Function:
+        """
+        Compile a program, or a part of it, to the function the VM runs at the top level.
+        """
+        self.state = FunctionState(None, Function("script"), "")
+        self.statements(statements)
+        self.emit(OpCode.NIL)
+        self.emit(OpCode.RETURN)
+        function = self.state.function
+        self.state = None
+        return function
+
+    def statements(self, statements: List[STMT.Stmt]) -> None:
+        for statement in statements:
+            if statement is not None:
+                statement.accept(self)
+
+    """
+    Emitting code
+    """
+
+    def emit(self, op: int, *operands: int, token: Token = None) -> int:
+        """
+        Append an instruction and return the offset of its first operand.
+        """
+        if token is not None:
+            self.token = token
+        chunk = self.state.function.chunk
+        chunk.write(op, self.token)
+        for operand in operands:
+            chunk.write(operand, self.token)
+        return len(chunk.code) - len(operands)
+
+    def emit_constant(self, value: object, token: Token = None) -> None:
+        self.emit(OpCode.CONSTANT, self.constant(value), token=token)
+
+    def constant(self, value: object) -> int:
+        return self.state.function.chunk.add_constant(value)
+
+    def emit_jump(self, op: int) -> int:
+        return self.emit(op, 0)
+
+    def patch_jump(self, offset: int) -> None:
+        # the jump is relative to the instruction following the jump operand.
+        code = self.state.function.chunk.code
+        code[offset] = len(code) - offset - 1
+
+    def emit_loop(self, start: int) -> None:
+        code = self.state.function.chunk.code
+        self.emit(OpCode.LOOP, len(code) + 2 - start)
+
+    """
+    Variables
+    """
+
+    def begin_scope(self) -> None:
+        self.state.scope_depth += 1
+
+    def end_scope(self) -> None:
+        state = self.state
+        state.scope_depth -= 1
+        while state.locals and state.locals[-1].depth > state.scope_depth:
+            local = state.locals.pop()
+            self.emit(OpCode.CLOSE_UPVALUE if local.is_captured else OpCode.POP)
+
+    def add_local(self, name: str) -> None:
+        """
+        Name the value on the top of the stack, it becomes a local of the current scope.
+        """
+        self.state.locals.append(Local(name, self.state.scope_depth))
+
+    def define_variable(self, name: Token) -> None:
+        """
+        Define the variable `name` with the value on the top of the stack.
+        """
+        if self.state.scope_depth > 0:
+            self.add_local(name.lexeme)
+        else:
+            self.emit(OpCode.DEFINE_GLOBAL, self.interpreter.globals.index(name.lexeme), token=name)
+
+    def resolve_local(self, state: FunctionState, name: str) -> Optional[int]:
+        for slot in range(len(state.locals) - 1, -1, -1):
+            if state.locals[slot].name == name:
+                return slot
+        return None
+
+    def resolve_upvalue(self, state: FunctionState, name: str) -> Optional[int]:
+        if state.enclosing is None:
+            return None
+
+        slot = self.resolve_local(state.enclosing, name)
+        if slot is not None:
+            state.enclosing.locals[slot].is_captured = True
+            return self.add_upvalue(state, True, slot)
+
+        index = self.resolve_upvalue(state.enclosing, name)
+        if index is not None:
+            return self.add_upvalue(state, False, index)
+        return None
+
+    def add_upvalue(self, state: FunctionState, is_local: bool, index: int) -> int:
+        upvalue = (is_local, index)
+        if upvalue in state.upvalues:
+            return state.upvalues.index(upvalue)
+        state.upvalues.append(upvalue)
+        state.function.upvalue_count = len(state.upvalues)
+        return len(state.upvalues) - 1
+
+    def variable(self, name: str, expr: EXPR.Expr, get: bool, token: Token) -> None:
+        """
+        Emit the instruction reading (or assigning the top of the stack to) the variable `name`
+        which the Resolver resolved on `expr`.
+        """
+        if expr.depth is None:
+            op = OpCode.GET_GLOBAL if get else OpCode.SET_GLOBAL
+            self.emit(op, expr.slot, token=token)
+            return
+
+        slot = self.resolve_local(self.state, name)
+        if slot is not None:
+            self.emit(OpCode.GET_LOCAL if get else OpCode.SET_LOCAL, slot, token=token)
+            return
+
+        index = self.resolve_upvalue(self.state, name)
+        self.emit(OpCode.GET_UPVALUE if get else OpCode.SET_UPVALUE, index, token=token)
+
+    def named_variable(self, name: str, token: Token) -> None:
+        """
+        Read a local or an upvalue the compiler introduced itself, i.e. "this" and "super".
+        """
+        slot = self.resolve_local(self.state, name)
+        if slot is not None:
+            self.emit(OpCode.GET_LOCAL, slot, token=token)
+        else:
+            self.emit(OpCode.GET_UPVALUE, self.resolve_upvalue(self.state, name), token=token)
+
+    def function(self, declaration, name: str, receiver: str = "", is_initializer: bool = False) -> None:
+        """
+        Compile a function and emit the instruction creating its closure.
+        """
+        token = self.token
+        function = Function(name, len(declaration.params), is_initializer)
+        self.state = FunctionState(self.state, function, receiver)
+        self.begin_scope()
+        for param in declaration.params:
+            self.add_local(param.lexeme)
+        self.statements(declaration.body)
+        # falling off the end of a function returns nil, initializers included.
+        self.emit(OpCode.NIL)
+        self.emit(OpCode.RETURN)
+
+        state = self.state
+        self.state = state.enclosing
+        self.token = token
+        operands = [self.constant(function)]
+        for is_local, index in state.upvalues:
+            operands.extend((int(is_local), index))
+        self.emit(OpCode.CLOSURE, *operands)
+
+    """
+    Statements
+    """
+
+    def visitBlockStmt(self, stmt: STMT.Block) -> None:
+        self.begin_scope()
+        self.statements(stmt.statements)
+        self.end_scope()
+
+    def visitClassStmt(self, stmt: STMT.Class) -> None:
+        name = stmt.name
+        is_global = self.state.scope_depth == 0
+        self.emit(OpCode.CLASS, self.constant(name.lexeme), token=name)
+        self.define_variable(name)
+
+        if stmt.superclass is not None:
+            self.visitVariableExpr(stmt.superclass)
+            self.begin_scope()
+            self.add_local("super")
+            self.load_class(stmt, is_global)
+            self.emit(OpCode.INHERIT, token=stmt.superclass.name)
+
+        self.load_class(stmt, is_global)
+        for method in stmt.methods:
+            is_initializer = method.name.lexeme == "init"
+            self.token = method.name
+            self.function(method, method.name.lexeme, "this", is_initializer)
+            self.emit(OpCode.METHOD, self.constant(method.name.lexeme), token=method.name)
+        self.emit(OpCode.POP)
+
+        if stmt.superclass is not None:
+            self.end_scope()
+
+    def load_class(self, stmt: STMT.Class, is_global: bool) -> None:
+        if is_global:
+            self.emit(OpCode.GET_GLOBAL, self.interpreter.globals.index(stmt.name.lexeme), token=stmt.name)
+        else:
+            self.named_variable(stmt.name.lexeme, stmt.name)
+
+    def visitExpressionStmt(self, stmt: STMT.Expression) -> None:
+        stmt.expression.accept(self)
+        self.emit(OpCode.POP)
+
+    def visitFunctionStmt(self, stmt: STMT.Function) -> None:
+        self.token = stmt.name
+        if self.state.scope_depth > 0:
+            # a local function is named before its body is compiled, so that it can call itself.
+            self.add_local(stmt.name.lexeme)
+            self.function(stmt, stmt.name.lexeme)
+        else:
+            self.function(stmt, stmt.name.lexeme)
+            self.define_variable(stmt.name)
+
+    def visitIfStmt(self, stmt: STMT.If) -> None:
+        stmt.condition.accept(self)
+        then_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+        self.emit(OpCode.POP)
+        stmt.then_branch.accept(self)
+        else_jump = self.emit_jump(OpCode.JUMP)
+        self.patch_jump(then_jump)
+        self.emit(OpCode.POP)
+        if stmt.else_branch is not None:
+            stmt.else_branch.accept(self)
+        self.patch_jump(else_jump)
+
+    def visitPrintStmt(self, stmt: STMT.Print) -> None:
+        stmt.expression.accept(self)
+        self.emit(OpCode.PRINT)
+
+    def visitReturnStmt(self, stmt: STMT.Return) -> None:
+        self.token = stmt.keyword
+        if stmt.value is not None:
+            stmt.value.accept(self)
+        elif self.state.function.is_initializer:
+            # `return;` in an initializer returns the instance.
+            self.emit(OpCode.GET_LOCAL, 0)
+        else:
+            self.emit(OpCode.NIL)
+        self.emit(OpCode.RETURN)
+
+    def visitVarStmt(self, stmt: STMT.Var) -> None:
+        self.token = stmt.name
+        if stmt.initializer is not None:
+            stmt.initializer.accept(self)
+        else:
+            self.emit(OpCode.NIL)
+        self.define_variable(stmt.name)
+
+    def visitWhileStmt(self, stmt: STMT.While) -> None:
+        start = len(self.state.function.chunk.code)
+        stmt.condition.accept(self)
+        exit_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+        self.emit(OpCode.POP)
+        stmt.body.accept(self)
+        self.emit_loop(start)
+        self.patch_jump(exit_jump)
+        self.emit(OpCode.POP)
+
+    """
+    Expressions
+    """
+
+    def visitAssignExpr(self, expr: EXPR.Assign) -> None:
+        expr.value.accept(self)
+        self.variable(expr.name.lexeme, expr, False, expr.name)
+
+    def visitBinaryExpr(self, expr: EXPR.Binary) -> None:
+        expr.left.accept(self)
+        expr.right.accept(self)
+        self.emit(BINARY_OPCODES[expr.operator.kind], token=expr.operator)
+
+    def visitCallExpr(self, expr: EXPR.Call) -> None:
+        expr.callee.accept(self)
+        for argument in expr.arguments:
+            argument.accept(self)
+        self.emit(OpCode.CALL, len(expr.arguments), token=expr.paren)
+
+    def visitGetExpr(self, expr: EXPR.Get) -> None:
+        expr.object.accept(self)
+        self.emit(OpCode.GET_PROPERTY, self.constant(expr.name.lexeme), token=expr.name)
+
+    def visitGroupingExpr(self, expr: EXPR.Grouping) -> None:
+        expr.expression.accept(self)
+
+    def visitLambdaExpr(self, expr: EXPR.Lambda) -> None:
+        self.function(expr, expr.name)
+
+    def visitLiteralExpr(self, expr: EXPR.Literal) -> None:
+        value = expr.value
+        if value is None:
+            self.emit(OpCode.NIL)
+        elif value is True:
+            self.emit(OpCode.TRUE)
+        elif value is False:
+            self.emit(OpCode.FALSE)
+        else:
+            self.emit_constant(value)
+
+    def visitLogicalExpr(self, expr: EXPR.Logical) -> None:
+        expr.left.accept(self)
+        if expr.operator.kind == TokenType.OR:
+            else_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+            end_jump = self.emit_jump(OpCode.JUMP)
+            self.patch_jump(else_jump)
+            self.emit(OpCode.POP)
+            expr.right.accept(self)
+            self.patch_jump(end_jump)
+        else:
+            end_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+            self.emit(OpCode.POP)
+            expr.right.accept(self)
+            self.patch_jump(end_jump)
+
+    def visitSetExpr(self, expr: EXPR.Set) -> None:
+        expr.object.accept(self)
+        expr.value.accept(self)
+        self.emit(OpCode.SET_PROPERTY, self.constant(expr.name.lexeme), token=expr.name)
+
+    def visitSuperExpr(self, expr: EXPR.Super) -> None:
+        self.named_variable("this", expr.keyword)
+        self.named_variable("super", expr.keyword)
+        self.emit(OpCode.GET_SUPER, self.constant(expr.method.lexeme), token=expr.method)
+
+    def visitThisExpr(self, expr: EXPR.This) -> None:
+        self.named_variable("this", expr.keyword)
+
+    def visitUnaryExpr(self, expr: EXPR.Unary) -> None:
+        expr.right.accept(self)
+        if expr.operator.kind == TokenType.MINUS:
+            self.emit(OpCode.NEGATE, token=expr.operator)
+        else:
+            self.emit(OpCode.NOT, token=expr.operator)
+
+    def visitVariableExpr(self, expr: EXPR.Variable) -> None:
+        self.variable(expr.name.lexeme, expr, True, expr.name)
+
+
+BINARY_OPCODES = {
+    TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+    TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+    TokenType.GREATER: OpCode.GREATER,
+    TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    TokenType.LESS: OpCode.LESS,
+    TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+    TokenType.PLUS: OpCode.ADD,
+    TokenType.MINUS: OpCode.SUBTRACT,
+    TokenType.STAR: OpCode.MULTIPLY,
+    TokenType.SLASH: OpCode.DIVIDE,
+}
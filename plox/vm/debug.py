@@ -0,0 +1,73 @@
+from typing import List
+from plox.vm.chunk import OpCode, OPCODE_NAMES, Chunk, Function
+
+
+"""
+Instructions whose single operand indexes the constant pool, and jumps whose operand is an offset.
+"""
+CONSTANT_OPERAND = {
+    OpCode.CONSTANT, OpCode.GET_PROPERTY, OpCode.SET_PROPERTY, OpCode.GET_SUPER, OpCode.CLASS, OpCode.METHOD,
+}
+INT_OPERAND = {
+    OpCode.GET_LOCAL, OpCode.SET_LOCAL, OpCode.GET_GLOBAL, OpCode.DEFINE_GLOBAL, OpCode.SET_GLOBAL,
+    OpCode.GET_UPVALUE, OpCode.SET_UPVALUE, OpCode.CALL,
+}
+JUMP_OPERAND = {OpCode.JUMP: 1, OpCode.JUMP_IF_FALSE: 1, OpCode.LOOP: -1}
+
+
+def disassemble(function: Function) -> str:
+    """
+    Return the listing of the bytecode of `function` followed by those of the functions it defines.
+    """
+    lines = [f"== {function.name} =="]
+    chunk = function.chunk
+    offset = 0
+    while offset < len(chunk.code):
+        offset = disassemble_instruction(chunk, offset, lines)
+
+    for constant in chunk.constants:
+        if isinstance(constant, Function):
+            lines.append("")
+            lines.append(disassemble(constant))
+    return "\n".join(lines)
+
+
+def disassemble_instruction(chunk: Chunk, offset: int, lines: List[str]) -> int:
+    """
+    Append the listing of the instruction at `offset` to `lines`, return the offset of the next one.
+    The line of the source is printed as `|` when it is the same as the previous instruction.
+    """
+    op = chunk.code[offset]
+    token = chunk.tokens[offset]
+    line = token.line if token is not None else 0
+    previous = chunk.tokens[offset - 1] if offset > 0 else None
+    if offset > 0 and previous is not None and previous.line == line:
+        prefix = f"{offset:04d}    | "
+    else:
+        prefix = f"{offset:04d} {line:4d} "
+    name = OPCODE_NAMES.get(op, f"UNKNOWN {op}")
+
+    if op in CONSTANT_OPERAND:
+        index = chunk.code[offset + 1]
+        lines.append(f"{prefix}{name:<16} {index:4d} '{chunk.constants[index]}'")
+        return offset + 2
+    if op in INT_OPERAND:
+        lines.append(f"{prefix}{name:<16} {chunk.code[offset + 1]:4d}")
+        return offset + 2
+    if op in JUMP_OPERAND:
+        target = offset + 2 + JUMP_OPERAND[op] * chunk.code[offset + 1]
+        lines.append(f"{prefix}{name:<16} {offset:4d} -> {target}")
+        return offset + 2
+    if op == OpCode.CLOSURE:
+        index = chunk.code[offset + 1]
+        function = chunk.constants[index]
+        lines.append(f"{prefix}{name:<16} {index:4d} {function}")
+        offset += 2
+        for _ in range(function.upvalue_count):
+            is_local, slot = chunk.code[offset], chunk.code[offset + 1]
+            lines.append(f"{offset:04d}    |   {'local' if is_local else 'upvalue'} {slot}")
+            offset += 2
+        return offset
+
+    lines.append(f"{prefix}{name}")
+    return offset + 1
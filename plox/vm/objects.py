@@ -0,0 +1,65 @@
+from typing import List
+from plox.syntax.loxcallable import LoxCallable
+from plox.vm.chunk import Function
+
+
+class Upvalue:
+    """
+    Reference to a variable captured by a closure. While the variable is on the VM stack the
+    upvalue points into the stack, once it goes out of scope the VM closes the upvalue by
+    moving the value into a list of its own, so reading an upvalue is always `cells[index]`.
+    """
+    __slots__ = ("cells", "index")
+
+    def __init__(self, cells: List[object], index: int):
+        self.cells = cells
+        self.index = index
+
+    def close(self) -> None:
+        self.cells = [self.cells[self.index]]
+        self.index = 0
+
+
+class Closure(LoxCallable):
+    """
+    Runtime value of a Lox function run by the VM: the compiled function and its upvalues.
+    Like a LoxFunction it can be bound to an instance, stored in a LoxClass and called
+    from native code.
+    """
+    __slots__ = ("function", "upvalues")
+
+    def __init__(self, function: Function, upvalues: List[Upvalue]):
+        self.function = function
+        self.upvalues = upvalues
+
+    def bind(self, instance) -> "BoundMethod":
+        return BoundMethod(instance, self)
+
+    def call(self, interpreter, arguments: List[object]) -> object:
+        return interpreter.call_closure(self, self, arguments)
+
+    def arity(self) -> int:
+        return self.function.arity
+
+    def __str__(self) -> str:
+        return str(self.function)
+
+
+class BoundMethod(LoxCallable):
+    """
+    A method read from an instance: calling it runs the method with the instance in slot 0.
+    """
+    __slots__ = ("receiver", "method")
+
+    def __init__(self, receiver, method: Closure):
+        self.receiver = receiver
+        self.method = method
+
+    def call(self, interpreter, arguments: List[object]) -> object:
+        return interpreter.call_closure(self.method, self.receiver, arguments)
+
+    def arity(self) -> int:
+        return self.method.function.arity
+
+    def __str__(self) -> str:
+        return str(self.method)
@@ -0,0 +1,436 @@
+from typing import List
+from plox.syntax import stmt as STMT
+from plox.syntax.interpreter import Interpreter
+from plox.syntax.environment import UNDEFINED
+from plox.syntax.loxcallable import LoxCallable
+from plox.syntax.loxclass import LoxClass
+from plox.syntax.loxinstance import LoxInstance
+from plox.error import PLoxRuntimeError
+from plox.vm.chunk import OpCode
+from plox.vm.compiler import Compiler
+from plox.vm.objects import BoundMethod, Closure, Upvalue
+
+
+"""
+Default maximum number of nested calls, deeper recursion is reported as a runtime error.
+"""
+FRAMES_MAX = 4096
+
+
+class VM(Interpreter):
+    """
+    Stack-based virtual machine running the bytecode produced by the `Compiler`.
+
+    The VM is an execution engine like the tree-walking Interpreter and shares its globals,
+    its resolution of globals and its value semantics (LoxClass, LoxInstance, stringify,
+    truthiness and equality). A program is compiled to a script function which `run` executes
+    in a single dispatch loop: Lox calls push a frame on the VM stack instead of recursing in
+    Python, and locals are slots of the VM stack instead of Environments.
+
+    The call frames live on the heap, so the recursion depth of a Lox program is not bound by
+    the Python stack but by `frames_max`. Deeper recursion raises a "Stack overflow." runtime error.
+    """
+    def __init__(self, frames_max: int = FRAMES_MAX):
+        super().__init__()
+        self.compiler = Compiler(self)
+        self.stack: List[object] = []
+        # upvalues still pointing into the stack, by stack index.
+        self.open_upvalues = {}
+        self.frames_max = frames_max
+        # frames of the runs suspended while a native function calls back into Lox code.
+        self.outer_frames = 0
+
+    def interpret(self, statements) -> None:
+        try:
+            self.execute_function(self.compiler.compile(statements))
+        except PLoxRuntimeError as e:
+            self.reset()
+            self.runtime_error(e)
+        finally:
+            self.output.flush()
+
+    def execute(self, stmt: STMT.Stmt):
+        try:
+            self.execute_function(self.compiler.compile([stmt]))
+        except PLoxRuntimeError:
+            self.reset()
+            raise
+
+    def execute_function(self, function) -> object:
+        closure = Closure(function, [])
+        return self.call_closure(closure, closure, [])
+
+    def call_closure(self, closure: Closure, receiver: object, arguments: List[object]) -> object:
+        """
+        Call a closure from Python, e.g. from a native function, and return its result.
+        """
+        base = len(self.stack)
+        self.stack.append(receiver)
+        self.stack.extend(arguments)
+        return self.run(closure, base, False)
+
+    def reset(self) -> None:
+        self.stack.clear()
+        self.open_upvalues.clear()
+        self.outer_frames = 0
+
+    def capture_upvalue(self, index: int) -> Upvalue:
+        upvalue = self.open_upvalues.get(index)
+        if upvalue is None:
+            upvalue = self.open_upvalues[index] = Upvalue(self.stack, index)
+        return upvalue
+
+    def close_upvalues(self, last: int) -> None:
+        """
+        Close the upvalues pointing at stack index `last` or above, they are going out of scope.
+        """
+        open_upvalues = self.open_upvalues
+        for index in [index for index in open_upvalues if index >= last]:
+            open_upvalues.pop(index).close()
+
+    def error(self, closure: Closure, ip: int, message: str) -> PLoxRuntimeError:
+        # every cell of an instruction holds its token, `ip` is past the opcode or one of its operands.
+        return PLoxRuntimeError(closure.function.chunk.tokens[ip - 1], message)
+
+    def run(self, closure: Closure, base: int, constructor: bool) -> object:
+        """
+        Run `closure` whose frame starts at `base` on the stack, until it returns.
+        """
+        stack = self.stack
+        push = stack.append
+        pop = stack.pop
+        globals = self.globals.values
+        open_upvalues = self.open_upvalues
+        stringify = self.stringify
+        write = self.output.write
+        is_equal = self.is_equal
+        # the suspended frames of the callers, the current frame is kept in local variables.
+        frames = []
+        frames_max = self.frames_max - self.outer_frames
+
+        code = closure.function.chunk.code
+        constants = closure.function.chunk.constants
+        upvalues = closure.upvalues
+        ip = 0
+
+        CONSTANT = OpCode.CONSTANT
+        NIL = OpCode.NIL
+        TRUE = OpCode.TRUE
+        FALSE = OpCode.FALSE
+        POP = OpCode.POP
+        GET_LOCAL = OpCode.GET_LOCAL
+        SET_LOCAL = OpCode.SET_LOCAL
+        GET_GLOBAL = OpCode.GET_GLOBAL
+        DEFINE_GLOBAL = OpCode.DEFINE_GLOBAL
+        SET_GLOBAL = OpCode.SET_GLOBAL
+        GET_UPVALUE = OpCode.GET_UPVALUE
+        SET_UPVALUE = OpCode.SET_UPVALUE
+        GET_PROPERTY = OpCode.GET_PROPERTY
+        SET_PROPERTY = OpCode.SET_PROPERTY
+        GET_SUPER = OpCode.GET_SUPER
+        EQUAL = OpCode.EQUAL
+        NOT_EQUAL = OpCode.NOT_EQUAL
+        GREATER = OpCode.GREATER
+        GREATER_EQUAL = OpCode.GREATER_EQUAL
+        LESS = OpCode.LESS
+        LESS_EQUAL = OpCode.LESS_EQUAL
+        ADD = OpCode.ADD
+        SUBTRACT = OpCode.SUBTRACT
+        MULTIPLY = OpCode.MULTIPLY
+        DIVIDE = OpCode.DIVIDE
+        NOT = OpCode.NOT
+        NEGATE = OpCode.NEGATE
+        PRINT = OpCode.PRINT
+        JUMP = OpCode.JUMP
+        JUMP_IF_FALSE = OpCode.JUMP_IF_FALSE
+        LOOP = OpCode.LOOP
+        CALL = OpCode.CALL
+        CLOSURE = OpCode.CLOSURE
+        CLOSE_UPVALUE = OpCode.CLOSE_UPVALUE
+        RETURN = OpCode.RETURN
+        CLASS = OpCode.CLASS
+        INHERIT = OpCode.INHERIT
+        METHOD = OpCode.METHOD
+
+        while True:
+            op = code[ip]
+            ip += 1
+
+            # the instructions are tested roughly by decreasing frequency.
+            if op == GET_LOCAL:
+                push(stack[base + code[ip]])
+                ip += 1
+
+            elif op == CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+
+            elif op == GET_GLOBAL:
+                value = globals[code[ip]]
+                ip += 1
+                if value is UNDEFINED:
+                    name = closure.function.chunk.tokens[ip - 1]
+                    raise self.error(closure, ip, f"Variable {name.lexeme} does not exist.")
+                push(value)
+
+            elif op == JUMP_IF_FALSE:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip += code[ip] + 1
+                else:
+                    ip += 1
+
+            elif op == POP:
+                pop()
+
+            elif op == ADD:
+                b = pop()
+                a = stack[-1]
+                if type(a) is float and type(b) is float:
+                    stack[-1] = a + b
+                elif isinstance(a, str) or isinstance(b, str):
+                    stack[-1] = stringify(a) + stringify(b)
+                else:
+                    stack[-1] = None
+
+            elif op == SUBTRACT:
+                b = pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    raise self.error(closure, ip, "operand must be a number")
+                stack[-1] = a - b
+
+            elif op == LESS:
+                b = pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    raise self.error(closure, ip, "operand must be a number")
+                stack[-1] = a < b
+
+            elif op == SET_LOCAL:
+                stack[base + code[ip]] = stack[-1]
+                ip += 1
+
+            elif op == LOOP:
+                ip += 1 - code[ip]
+
+            elif op == JUMP:
+                ip += code[ip] + 1
+
+            elif op == CALL:
+                argc = code[ip]
+                ip += 1
+                callee_index = len(stack) - argc - 1
+                callee = stack[callee_index]
+                callee_type = type(callee)
+
+                if callee_type is Closure or callee_type is BoundMethod or callee_type is LoxClass:
+                    is_constructor = False
+                    if callee_type is BoundMethod:
+                        stack[callee_index] = callee.receiver
+                        callee = callee.method
+                    elif callee_type is LoxClass:
+                        instance = stack[callee_index] = LoxInstance(callee)
+                        initializer = callee.initializer
+                        if initializer is None:
+                            if argc != 0:
+                                raise self.error(closure, ip, f"Expected 0 arguments but got {argc}.")
+                            continue
+                        callee = initializer
+                        is_constructor = True
+
+                    if argc != callee.function.arity:
+                        raise self.error(closure, ip, f"Expected {callee.function.arity} arguments but got {argc}.")
+                    if len(frames) >= frames_max:
+                        raise self.error(closure, ip, "Stack overflow.")
+
+                    frames.append((closure, code, constants, upvalues, ip, base, constructor))
+                    closure = callee
+                    code = callee.function.chunk.code
+                    constants = callee.function.chunk.constants
+                    upvalues = callee.upvalues
+                    ip = 0
+                    base = callee_index
+                    constructor = is_constructor
+
+                elif isinstance(callee, LoxCallable):
+                    if argc != callee.arity():
+                        raise self.error(closure, ip, f"Expected {callee.arity()} arguments but got {argc}.")
+                    arguments = stack[callee_index + 1:]
+                    del stack[callee_index:]
+                    # a native calling back into Lox code runs it in a nested `run`, on the Python stack.
+                    depth = len(frames) + 1
+                    self.outer_frames += depth
+                    try:
+                        push(callee.call(self, arguments))
+                    except RecursionError:
+                        raise self.error(closure, ip, "Stack overflow.") from None
+                    finally:
+                        self.outer_frames -= depth
+
+                else:
+                    raise self.error(closure, ip, "Can only call functions and classes.")
+
+            elif op == RETURN:
+                result = pop()
+                if constructor:
+                    # calling a class returns the instance whatever its initializer returns.
+                    result = stack[base]
+                if open_upvalues:
+                    self.close_upvalues(base)
+                del stack[base:]
+                if not frames:
+                    return result
+                push(result)
+                closure, code, constants, upvalues, ip, base, constructor = frames.pop()
+
+            elif op == GET_UPVALUE:
+                upvalue = upvalues[code[ip]]
+                push(upvalue.cells[upvalue.index])
+                ip += 1
+
+            elif op == SET_UPVALUE:
+                upvalue = upvalues[code[ip]]
+                upvalue.cells[upvalue.index] = stack[-1]
+                ip += 1
+
+            elif op == SET_GLOBAL:
+                index = code[ip]
+                ip += 1
+                if globals[index] is UNDEFINED:
+                    name = closure.function.chunk.tokens[ip - 1]
+                    raise self.error(closure, ip, f"Undefined variable {name.lexeme}.")
+                globals[index] = stack[-1]
+
+            elif op == GET_PROPERTY:
+                instance = stack[-1]
+                ip += 1
+                if not isinstance(instance, LoxInstance):
+                    raise self.error(closure, ip, "Only instances have properties.")
+                index = instance.shape.indices.get(constants[code[ip - 1]])
+                if index is not None:
+                    stack[-1] = instance.values[index]
+                else:
+                    stack[-1] = instance.get(closure.function.chunk.tokens[ip - 1])
+
+            elif op == SET_PROPERTY:
+                value = pop()
+                instance = stack[-1]
+                ip += 1
+                if not isinstance(instance, LoxInstance):
+                    raise self.error(closure, ip, "Only instances have fields.")
+                instance.set_field(constants[code[ip - 1]], value)
+                stack[-1] = value
+
+            elif op == MULTIPLY:
+                b = pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    raise self.error(closure, ip, "operand must be a number")
+                stack[-1] = a * b
+
+            elif op == DIVIDE:
+                b = pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    raise self.error(closure, ip, "operand must be a number")
+                stack[-1] = a / b
+
+            elif op == GREATER:
+                b = pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    raise self.error(closure, ip, "operand must be a number")
+                stack[-1] = a > b
+
+            elif op == GREATER_EQUAL:
+                b = pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    raise self.error(closure, ip, "operand must be a number")
+                stack[-1] = a >= b
+
+            elif op == LESS_EQUAL:
+                b = pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    raise self.error(closure, ip, "operand must be a number")
+                stack[-1] = a <= b
+
+            elif op == EQUAL:
+                b = pop()
+                stack[-1] = is_equal(stack[-1], b)
+
+            elif op == NOT_EQUAL:
+                b = pop()
+                stack[-1] = not is_equal(stack[-1], b)
+
+            elif op == NOT:
+                value = stack[-1]
+                stack[-1] = value is None or value is False
+
+            elif op == NEGATE:
+                value = stack[-1]
+                if type(value) is not float:
+                    raise self.error(closure, ip, "operand must be a number")
+                stack[-1] = -value
+
+            elif op == NIL:
+                push(None)
+
+            elif op == TRUE:
+                push(True)
+
+            elif op == FALSE:
+                push(False)
+
+            elif op == PRINT:
+                write(stringify(pop()))
+
+            elif op == DEFINE_GLOBAL:
+                globals[code[ip]] = pop()
+                ip += 1
+
+            elif op == CLOSURE:
+                function = constants[code[ip]]
+                ip += 1
+                captured = []
+                for _ in range(function.upvalue_count):
+                    if code[ip]:
+                        captured.append(self.capture_upvalue(base + code[ip + 1]))
+                    else:
+                        captured.append(upvalues[code[ip + 1]])
+                    ip += 2
+                push(Closure(function, captured))
+
+            elif op == CLOSE_UPVALUE:
+                self.close_upvalues(len(stack) - 1)
+                pop()
+
+            elif op == GET_SUPER:
+                superclass = pop()
+                instance = pop()
+                name = constants[code[ip]]
+                ip += 1
+                method = superclass.find_function(name)
+                if method is None:
+                    raise self.error(closure, ip, f"Undefined property '{name}'.")
+                push(method.bind(instance))
+
+            elif op == CLASS:
+                push(LoxClass(constants[code[ip]], None, dict()))
+                ip += 1
+
+            elif op == INHERIT:
+                superclass = stack[-2]
+                if not isinstance(superclass, LoxClass):
+                    raise self.error(closure, ip, "Superclass must be a class.")
+                pop().inherit(superclass)
+
+            elif op == METHOD:
+                method = pop()
+                stack[-1].add_method(constants[code[ip]], method)
+                ip += 1
+
+            else:
+                raise RuntimeError(f"Unknown opcode {op}.")